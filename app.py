@@ -1,8 +1,14 @@
 import dash
 from dash import html, dash_table, dcc, Input, Output, State, ALL, callback_context
 import json
+import os
+import flask
+from werkzeug.middleware.proxy_fix import ProxyFix
 import modules.cutting.analytics as cut_analytics
+import modules.schedule.analytics as sched_analytics
+import modules.inventory.analytics as inv_analytics
 import global_callbacks # [NEW] Import the new callback manager
+import solver_pool
 from common.styles import *
 
 # --- Server Start ---
@@ -16,6 +22,12 @@ external_stylesheets = ['https://fonts.googleapis.com/css2?family=Inter:wght@400
 app = dash.Dash(__name__, external_stylesheets=external_stylesheets, title='OptiMystic Solver', suppress_callback_exceptions=True)
 server = app.server
 
+# Behind N reverse proxies, trust their X-Forwarded-For so remote_addr (the
+# solver pool's per-client key) is the real client, not the proxy
+TRUSTED_PROXIES = int(os.environ.get('OPTIMYSTIC_TRUSTED_PROXIES', 0))
+if TRUSTED_PROXIES:
+    server.wsgi_app = ProxyFix(server.wsgi_app, x_for=TRUSTED_PROXIES)
+
 # --- Styles & Layouts ---
 app_wrapper_style = {'position': 'fixed', 'top': 0, 'left': 0, 'right': 0, 'bottom': 0, 'backgroundColor': '#eaeff2', 'display': 'flex', 'justifyContent': 'center', 'alignItems': 'center', 'fontFamily': 'Inter, sans-serif'}
 main_box_style = {'width': '1280px', 'maxWidth': '96%', 'height': '92vh', 'backgroundColor': 'white', 'borderRadius': '16px', 'boxShadow': '0 20px 60px rgba(0,0,0,0.08)', 'display': 'flex', 'flexDirection': 'column', 'overflow': 'hidden'}
@@ -31,16 +43,15 @@ TEMPLATE_GALLERY = [{"id": "cutting", "icon": "✂️", "title": "Cutting Stock"
 ui_packing = html.Div([html.H4("📦 Bin Packing"), dash_table.DataTable(id='pack-table', columns=[{'name':'Item','id':'Item'},{'name':'Weight','id':'Weight'},{'name':'Value','id':'Value'}], data=[{'Item': 'Box1', 'Weight': 30, 'Value': 50}], editable=True, row_deletable=True, style_table=TABLE_CONTAINER_STYLE, css=FIXED_CSS, style_header=TABLE_HEADER_STYLE, style_cell=TABLE_CELL_STYLE), html.Button("Add", id='btn-add-pack', style=ADD_BTN_STYLE)])
 ui_blending = html.Div([html.H4("🧪 Blending"), dash_table.DataTable(id='blend-table', columns=[{'name':'Ingr','id':'Ingr'},{'name':'Cost','id':'Cost'},{'name':'NutA','id':'NutA'},{'name':'NutB','id':'NutB'}], data=[{'Ingr': 'A', 'Cost': 10, 'NutA': 1, 'NutB': 2}], editable=True, row_deletable=True, style_table=TABLE_CONTAINER_STYLE, css=FIXED_CSS, style_header=TABLE_HEADER_STYLE, style_cell=TABLE_CELL_STYLE), html.Button("Add", id='btn-add-blend', style=ADD_BTN_STYLE)])
 ui_prod_mix = html.Div([html.H4("🏭 Production Mix"), dash_table.DataTable(id='pm-products-table', columns=[{'name':'Product','id':'Product'},{'name':'Profit','id':'Profit'}], data=[{'Product': 'P1', 'Profit': 100}], editable=True, style_table=TABLE_CONTAINER_STYLE, css=FIXED_CSS, style_header=TABLE_HEADER_STYLE, style_cell=TABLE_CELL_STYLE), dash_table.DataTable(id='pm-resource-matrix', columns=[{'name':'Resource','id':'resource'}, {'name': 'Availability', 'id': 'avail'}], data=[{'resource': 'Labor', 'avail': 100}], editable=True, style_table=TABLE_CONTAINER_STYLE, css=FIXED_CSS, style_header=TABLE_HEADER_STYLE, style_cell=TABLE_CELL_STYLE), html.Button("Add Prod", id='pm-add-prod-btn', style=ADD_BTN_STYLE), html.Button("Add Res", id='pm-add-res-btn', style=ADD_BTN_STYLE)])
-ui_schedule = html.Div([html.H4("📅 Scheduling"), dash_table.DataTable(id='sched-matrix', columns=[{'name':'Staff','id':'staff'}], data=[{'staff': 'Staff1'}], editable=True, style_table=TABLE_CONTAINER_STYLE, css=FIXED_CSS, style_header=TABLE_HEADER_STYLE, style_cell=TABLE_CELL_STYLE), html.Button("Add", id='btn-add-staff', style=ADD_BTN_STYLE)])
 ui_transport = html.Div([html.H4("🚚 Transportation"), dash_table.DataTable(id='trans-supply', columns=[{'name':'Src','id':'Src'}, {'name': 'Cap', 'id': 'Cap'}], data=[{'Src': 'F1', 'Cap': 100}], editable=True, style_table=TABLE_CONTAINER_STYLE, css=FIXED_CSS, style_header=TABLE_HEADER_STYLE, style_cell=TABLE_CELL_STYLE), dash_table.DataTable(id='trans-demand', columns=[{'name':'Dst','id':'Dst'}, {'name': 'Dem', 'id': 'Dem'}], data=[{'Dst': 'S1', 'Dem': 50}], editable=True, style_table=TABLE_CONTAINER_STYLE, css=FIXED_CSS, style_header=TABLE_HEADER_STYLE, style_cell=TABLE_CELL_STYLE), dash_table.DataTable(id='trans-cost-matrix', columns=[{'name':'Label','id':'label'}], data=[], editable=True, style_table=TABLE_CONTAINER_STYLE, css=FIXED_CSS, style_header=TABLE_HEADER_STYLE, style_cell=TABLE_CELL_STYLE), html.Button("Add Src", id='btn-add-source', style=ADD_BTN_STYLE), html.Button("Add Dst", id='btn-add-dest', style=ADD_BTN_STYLE)])
-ui_inventory = html.Div([html.H4("📦 Inventory"), dash_table.DataTable(id='inv-table', columns=[{'name':'Item','id':'Item'}, {'name': 'Demand', 'id': 'Demand'}, {'name': 'Cost', 'id': 'Cost'}], data=[], editable=True, style_table=TABLE_CONTAINER_STYLE, css=FIXED_CSS, style_header=TABLE_HEADER_STYLE, style_cell=TABLE_CELL_STYLE), html.Button("Add", id='btn-add-inv', style=ADD_BTN_STYLE)])
 ui_investment = html.Div([html.H4("💰 Investment"), dash_table.DataTable(id='invest-table', columns=[{'name':'Project','id':'Project'}, {'name': 'Cost', 'id': 'Cost'}, {'name': 'Return', 'id': 'Return'}], data=[], editable=True, style_table=TABLE_CONTAINER_STYLE, css=FIXED_CSS, style_header=TABLE_HEADER_STYLE, style_cell=TABLE_CELL_STYLE), html.Button("Add", id='btn-add-invest', style=ADD_BTN_STYLE)])
 
 # --- Modeling & Dashboard ---
 modeling_section = html.Div([
     html.Div([html.H4("⚙️ Solver Configuration", style={'color': '#4a4e69', 'fontWeight': '700', 'marginBottom': '8px'}), html.P("Configure how the AI solves your problem.", style={'color': '#888', 'fontSize': '13px'})], style={'marginBottom': '30px'}),
     html.Div([html.Label("Optimization Goal", style={'fontSize': '12px', 'fontWeight': '700', 'textTransform': 'uppercase', 'color': '#888', 'marginBottom': '10px', 'display': 'block', 'letterSpacing': '0.5px'}), dcc.RadioItems(id='solver-sense', options=[{'label': ' Minimize Cost', 'value': 'minimize'}, {'label': ' Maximize Profit', 'value': 'maximize'}], value='minimize', labelStyle={'display': 'block', 'marginBottom': '8px', 'fontWeight': '600', 'color': '#4a4e69', 'cursor': 'pointer'}, inputStyle={'marginRight': '10px'})], style={'backgroundColor': '#f8f9fa', 'padding': '25px', 'borderRadius': '12px', 'marginBottom': '25px', 'border': '1px solid #e9ecef'}),
-    html.Details([html.Summary("🔧 Advanced: View/Edit Mathematical Model", style={'cursor': 'pointer', 'fontWeight': '600', 'color': '#007bff', 'fontSize': '14px'}), html.Div([html.Label("Objective Function:", style={'fontWeight': 'bold', 'marginTop': '15px', 'display': 'block', 'fontSize': '13px'}), dcc.Textarea(id='solver-objective', style={'width': '100%', 'height': '80px', 'border': '1px solid #ccc', 'padding': '12px', 'borderRadius': '8px', 'fontFamily': 'monospace', 'backgroundColor': '#fcfcfc', 'marginTop': '5px', 'fontSize': '12px'}), html.Label("Constraints:", style={'fontWeight': 'bold', 'marginTop': '15px', 'display': 'block', 'fontSize': '13px'}), dcc.Textarea(id='solver-constraints', style={'width': '100%', 'height': '150px', 'border': '1px solid #ccc', 'padding': '12px', 'borderRadius': '8px', 'fontFamily': 'monospace', 'backgroundColor': '#fcfcfc', 'marginTop': '5px', 'fontSize': '12px'})], style={'padding': '20px', 'border': '1px solid #eee', 'borderRadius': '12px', 'marginTop': '10px', 'backgroundColor': 'white'})], style={'marginBottom': '30px'}),
+    html.Div([html.Label("Alternative Plans", style={'fontSize': '12px', 'fontWeight': '700', 'textTransform': 'uppercase', 'color': '#888', 'marginBottom': '10px', 'display': 'block', 'letterSpacing': '0.5px'}), html.Span("Plans:", style={'fontWeight': '600', 'color': '#4a4e69', 'fontSize': '14px'}), dcc.Input(id='solver-pool-size', type='number', value=1, min=1, max=10, step=1, style={'width': '70px', 'padding': '6px 10px', 'borderRadius': '4px', 'border': '1px solid #ccc', 'fontSize': '14px', 'marginRight': '20px', 'marginLeft': '8px'}), html.Span("Max Gap (%):", style={'fontWeight': '600', 'color': '#4a4e69', 'fontSize': '14px'}), dcc.Input(id='solver-pool-gap', type='number', value=5, min=0, step=0.5, style={'width': '70px', 'padding': '6px 10px', 'borderRadius': '4px', 'border': '1px solid #ccc', 'fontSize': '14px', 'marginRight': '20px', 'marginLeft': '8px'}), html.P("Each extra plan is one more solver run (cutting also solves the exact model and a pattern master first), so more plans take proportionally longer.", style={'color': '#888', 'fontSize': '12px', 'margin': '10px 0 0 0'})], style={'backgroundColor': '#f8f9fa', 'padding': '25px', 'borderRadius': '12px', 'marginBottom': '25px', 'border': '1px solid #e9ecef'}),
+    html.Details([html.Summary("🔧 Advanced: View/Edit Mathematical Model", style={'cursor': 'pointer', 'fontWeight': '600', 'color': '#007bff', 'fontSize': '14px'}), html.Div([html.P(id='solver-model-note', style={'color': '#888', 'fontSize': '13px', 'margin': 0}), html.Label("Objective Function:", style={'fontWeight': 'bold', 'marginTop': '15px', 'display': 'block', 'fontSize': '13px'}), dcc.Textarea(id='solver-objective', style={'width': '100%', 'height': '80px', 'border': '1px solid #ccc', 'padding': '12px', 'borderRadius': '8px', 'fontFamily': 'monospace', 'backgroundColor': '#fcfcfc', 'marginTop': '5px', 'fontSize': '12px'}), html.Label("Constraints:", style={'fontWeight': 'bold', 'marginTop': '15px', 'display': 'block', 'fontSize': '13px'}), dcc.Textarea(id='solver-constraints', style={'width': '100%', 'height': '150px', 'border': '1px solid #ccc', 'padding': '12px', 'borderRadius': '8px', 'fontFamily': 'monospace', 'backgroundColor': '#fcfcfc', 'marginTop': '5px', 'fontSize': '12px'})], style={'padding': '20px', 'border': '1px solid #eee', 'borderRadius': '12px', 'marginTop': '10px', 'backgroundColor': 'white'})], style={'marginBottom': '30px'}),
     html.Button("🚀 Run Optimization Engine", id='btn-solve', n_clicks=0, style=PRIMARY_BTN_STYLE)
 ])
 
@@ -54,6 +65,11 @@ dashboard_section = html.Div([
         html.Div(id='res-insight-card', style={'backgroundColor': '#e3f2fd', 'padding': '25px', 'borderRadius': '12px', 'display': 'none'}, children=[html.H5("💡 Insight & Report", style={'color': '#0d47a1', 'fontWeight': '700', 'marginTop': 0, 'marginBottom': '10px'}), dcc.Markdown(id='res-insight-text', style={'fontSize': '15px', 'lineHeight': '1.6', 'color': '#0d47a1', 'margin': 0})]),
         html.Div(id='solver-error-msg', style={'display': 'none'}),
         html.Div(id='result-dashboard', style={'display': 'none'}, children=[
+            dcc.Store(id='res-pool-store'),
+            html.Div(id='res-pool-wrapper', style={'display': 'none'}, children=[html.Label("Switch Plan", style={'fontSize': '12px', 'fontWeight': '700', 'textTransform': 'uppercase', 'color': '#888', 'marginBottom': '8px', 'display': 'block'}), dcc.Dropdown(id='res-pool-select', clearable=False)]),
+            dcc.Store(id='res-commit-store'),
+            html.Div(id='res-commit-wrapper', style={'display': 'none'}, children=[html.Button("✅ Commit Plan to Remnant Inventory", id='btn-commit-plan', n_clicks=0, style=ADD_BTN_STYLE), dcc.Markdown(id='res-commit-msg', style={'fontSize': '14px', 'color': '#334155', 'marginTop': '10px'})]),
+            html.Div(id='res-reopt-wrapper', style={'display': 'none'}, children=[html.Label("Re-optimize After a Change", style={'fontSize': '12px', 'fontWeight': '700', 'textTransform': 'uppercase', 'color': '#888', 'marginBottom': '8px', 'display': 'block'}), html.P("Change demands or add items on the Data tab (e.g. a rush order), list the bars already cut, then re-optimize: those bars stay exactly as cut, every bar keeps its Stock #, and the rest of the plan changes as little as possible.", style={'color': '#888', 'fontSize': '12px', 'margin': '0 0 10px 0'}), html.Span("Bars Already Cut:", style={'fontWeight': '600', 'color': '#4a4e69', 'fontSize': '14px'}), dcc.Input(id='reopt-bars', type='text', placeholder='e.g. 1-3, 5', style={'width': '140px', 'padding': '6px 10px', 'borderRadius': '4px', 'border': '1px solid #ccc', 'fontSize': '14px', 'marginRight': '20px', 'marginLeft': '8px'}), html.Button("🔁 Re-optimize", id='btn-reopt', n_clicks=0, style=ADD_BTN_STYLE), dcc.Markdown(id='res-reopt-msg', style={'fontSize': '14px', 'color': '#334155', 'marginTop': '10px'})]),
             html.Div([html.H5("✂️ Visual Cutting Plan", style={'color': '#4a4e69', 'fontWeight':'700', 'borderBottom': '1px solid #eee', 'paddingBottom': '15px', 'marginTop': 0}), dcc.Graph(id='res-chart', style={'height': '350px'})], style={'backgroundColor': 'white', 'padding': '30px', 'borderRadius': '16px', 'border': '1px solid #f1f5f9', 'boxShadow': '0 4px 6px -1px rgba(0, 0, 0, 0.05)', 'marginBottom': '30px'}),
             html.Div([
                 html.Div([html.H6("📋 Detailed Job Instructions", style={'fontWeight': '700', 'marginBottom': '15px', 'color': '#334155'}), dash_table.DataTable(id='res-table', columns=[{'name': 'Stock ID', 'id': 'Stock'}, {'name': 'Details', 'id': 'Plan'}, {'name': 'Usage/Value', 'id': 'Usage'}], data=[], page_size=10, style_table=TABLE_CONTAINER_STYLE, css=FIXED_CSS, style_header=TABLE_HEADER_STYLE, style_cell=TABLE_CELL_STYLE)], style={'flex': 1}),
@@ -83,7 +99,7 @@ def render_workspace(mode):
     mapping = {
         'cutting': cut_analytics.render_input(), 
         'packing': ui_packing, 'blending': ui_blending, 'prod_mix': ui_prod_mix, 
-        'schedule': ui_schedule, 'transport': ui_transport, 'inventory': ui_inventory, 'investment': ui_investment
+        'schedule': sched_analytics.render_input(), 'transport': ui_transport, 'inventory': inv_analytics.render_input(), 'investment': ui_investment
     }
     ui_stack = []
     for m_key, component in mapping.items():
@@ -116,5 +132,13 @@ def router(pathname, tmpl_clicks, current_path):
 # [IMPORTANT] Initialize Global Callbacks Here
 global_callbacks.init_callbacks(app)
 
+# --- Solver Pool: start-up check & metrics (queue wait vs solve time) ---
+if not solver_pool.POOL.warm_up():
+    print("   - [Warning] CBC solver binary not available")
+
+@server.route('/solver-metrics')
+def solver_metrics():
+    return flask.jsonify(solver_pool.POOL.stats())
+
 if __name__ == '__main__':
     app.run_server(debug=True)
@@ -1,16 +1,49 @@
 # Import the separated logic module
 import modules.cutting.logic as cut_logic 
+import modules.cutting.patterns as cut_patterns
+import modules.schedule.logic as sched_logic
+import modules.inventory.logic as inv_logic
 
 def generate_logic(template_type, params):
     if template_type == 'cutting': 
         # Redirect to the new modular logic
         return cut_logic.bridge_cutting(params)
         
+    elif template_type == 'schedule': return sched_logic.bridge_schedule(params)
+    elif template_type == 'inventory': return inv_logic.bridge_inventory(params)
     elif template_type == 'transportation': return bridge_transportation(params)
     elif template_type == 'prod_mix': return bridge_product_mix(params)
     elif template_type == 'blending': return bridge_blending(params)
     return "", "", []
 
+def solve_native(template_type, store, pool_size=1, pool_gap=0.05):
+    """
+    Templates with their own engine bypass the string model in solver_engine.
+    Returns None when the template has no native engine.
+    """
+    params = {p['name']: p['data'] for p in store.get('parameters', [])}
+    # Alternative cutting plans come from the pattern master: its no-good cuts
+    # on the pattern set (Y_p) give plans with different patterns, not just
+    # different bar counts
+    if template_type == 'cutting' and (params.get('SetupCost', 0) > 0 or pool_size > 1):
+        return cut_patterns.solve_patterns(params, pool_size=pool_size, pool_gap=pool_gap)
+    if template_type == 'schedule': return sched_logic.solve_schedule(params)
+    if template_type == 'inventory': return inv_logic.solve_inventory(params)
+    return None
+
+def model_note(template_type, params):
+    """
+    (read_only, note) for the Advanced model view. Native engines don't read
+    the model text, so there it is documentation and can't be edited.
+    """
+    if template_type in ('schedule', 'inventory'):
+        return True, "Solved by the native engine: this model is documentation only."
+    if template_type == 'cutting' and params.get('SetupCost', 0) > 0:
+        return True, "Setup costs are solved by the pattern engine: this model is documentation only."
+    if template_type == 'cutting':
+        return False, "Edits apply to single-plan solves; alternative plans come from the pattern engine and re-optimization from the generated model."
+    return False, ""
+
 # ---------------------------------------------------------
 # Other Bridges (Kept strictly for legacy support)
 # ---------------------------------------------------------
@@ -0,0 +1,17 @@
+# common/inputs.py
+from dash import html, dcc
+
+# --- Labeled number input (template settings rows) ---
+def number_input(label, input_id, value, step=1, width='70px'):
+    return html.Div([
+        html.Label(label, style={'fontWeight': 'bold', 'color': '#333', 'marginRight': '10px', 'fontSize': '13px'}),
+        dcc.Input(id=input_id, type='number', value=value, min=0, step=step,
+                  style={'width': width, 'padding': '6px 10px', 'borderRadius': '4px', 'border': '1px solid #ccc', 'fontSize': '14px'})
+    ], style={'display': 'flex', 'alignItems': 'center', 'marginRight': '25px', 'marginBottom': '10px'})
+
+# --- Table cell parsing (blank or invalid cells fall back to the default) ---
+def safe_float(value, default=0.0):
+    try:
+        if value is None or str(value).strip() == '': return default
+        return float(value)
+    except: return default
@@ -0,0 +1,212 @@
+# expr_compiler.py
+import ast
+import io
+import keyword
+import tokenize
+from functools import lru_cache
+import pulp
+
+# Long "+"/"-" chains are lowered to one lpSum over a term list
+FLATTEN_MIN_TERMS = 8
+CACHE_SIZE = 8192
+# Work limits: a model line must not pin a solver slot or exhaust memory
+MAX_RANGE = 10**6             # elements of one range()
+MAX_ITERATIONS = 10**6        # comprehension steps per evaluated line
+_SEQUENCES = (str, bytes, list, tuple)
+
+_ALLOWED_NODES = (
+    ast.Expression, ast.Expr, ast.BinOp, ast.UnaryOp, ast.Compare, ast.BoolOp,
+    ast.Name, ast.Load, ast.Store, ast.Constant, ast.Subscript,
+    ast.Call, ast.GeneratorExp, ast.ListComp, ast.comprehension, ast.Tuple, ast.List,
+    ast.Add, ast.Sub, ast.Mult, ast.Div, ast.USub, ast.UAdd, ast.Not, ast.And, ast.Or,
+    ast.Eq, ast.NotEq, ast.Lt, ast.LtE, ast.Gt, ast.GtE, ast.In, ast.NotIn,
+)
+_COMPARE_OPS = {'<=', '>=', '==', '<', '>', '!='}
+_OPEN, _CLOSE = '([{', ')]}'
+
+
+class ExpressionError(ValueError):
+    pass
+
+
+def _range(*args):
+    r = range(*args)
+    if len(r) > MAX_RANGE:
+        raise ExpressionError(f"range() of {len(r):,} elements exceeds the limit of {MAX_RANGE:,}")
+    return r
+
+
+def _mul(a, b):
+    # "text" * n and [x] * n would allocate without bound
+    if isinstance(a, _SEQUENCES) or isinstance(b, _SEQUENCES):
+        raise ExpressionError("Repeating strings or lists with '*' is not allowed")
+    return a * b
+
+
+def _iteration_budget(limit):
+    left = [limit]
+    def guard(iterable):
+        for x in iterable:
+            left[0] -= 1
+            if left[0] < 0:
+                raise ExpressionError(f"Expression runs more than {limit:,} loop iterations")
+            yield x
+    return guard
+
+
+# Only these names may be called from a model expression (sum is lowered to lpSum)
+SAFE_CALLS = {'range': _range, 'len': len}
+
+
+def _validate(tree):
+    # ast.walk is iterative, so even very long expressions are safe to check
+    for node in ast.walk(tree):
+        if not isinstance(node, _ALLOWED_NODES):
+            raise ExpressionError(f"'{type(node).__name__}' is not allowed in a model expression")
+        if isinstance(node, ast.Name) and node.id.startswith('_'):
+            raise ExpressionError(f"Name '{node.id}' is not allowed")
+        if isinstance(node, ast.Constant) and not isinstance(node.value, (int, float, str)):
+            raise ExpressionError(f"Constant {node.value!r} is not allowed")
+        if isinstance(node, ast.Call):
+            if not isinstance(node.func, ast.Name) or (node.func.id not in SAFE_CALLS and node.func.id != 'sum'):
+                raise ExpressionError("Only sum(), range() and len() can be called")
+            if node.keywords:
+                raise ExpressionError("Keyword arguments are not allowed")
+        if isinstance(node, ast.comprehension) and node.is_async:
+            raise ExpressionError("Async comprehensions are not allowed")
+
+
+def _parse(text):
+    try:
+        tree = ast.parse(text.strip(), mode='eval')
+    except SyntaxError as e:
+        raise ExpressionError(f"Syntax error: {e.msg}")
+    except RecursionError:
+        raise ExpressionError("Expression is nested too deeply")
+    _validate(tree)
+    return tree.body
+
+
+def _split_top_level(text):
+    """
+    Splits a single expression at depth-0 comparison operators and, inside
+    each side, at depth-0 binary '+'/'-'. Returns [(terms, op, side_text), ...]
+    where terms is [(sign, term_text), ...], or None when the line has depth-0
+    keywords (and/or/if/...) and must be parsed as a whole.
+    Parsing the terms one by one keeps the AST flat, so 10k-term rows don't
+    hit the parser's recursion limit.
+    """
+    line_starts = [0]
+    for line in text.splitlines(keepends=True):
+        line_starts.append(line_starts[-1] + len(line))
+    offset = lambda pos: line_starts[pos[0] - 1] + pos[1]
+
+    sides, terms = [], []
+    depth, side_start, term_start, sign = 0, 0, 0, 1
+    prev_operand = False
+    try:
+        for tok in tokenize.generate_tokens(io.StringIO(text).readline):
+            if tok.type in (tokenize.NEWLINE, tokenize.NL, tokenize.ENDMARKER, tokenize.COMMENT, tokenize.INDENT, tokenize.DEDENT):
+                continue
+            s = tok.string
+            if tok.type == tokenize.OP and s in _OPEN: depth += 1
+            elif tok.type == tokenize.OP and s in _CLOSE: depth -= 1
+            if depth == 0 and tok.type == tokenize.NAME and keyword.iskeyword(s):
+                return None
+
+            if depth == 0 and tok.type == tokenize.OP and (s in _COMPARE_OPS or (s in '+-' and prev_operand)):
+                start = offset(tok.start)
+                terms.append((sign, text[term_start:start]))
+                if s in _COMPARE_OPS:
+                    sides.append((terms, s, text[side_start:start]))
+                    terms, sign = [], 1
+                    side_start = offset(tok.end)
+                else:
+                    sign = 1 if s == '+' else -1
+                term_start = offset(tok.end)
+                prev_operand = False
+                continue
+            prev_operand = tok.type in (tokenize.NAME, tokenize.NUMBER, tokenize.STRING) or (tok.type == tokenize.OP and s in _CLOSE)
+    except (tokenize.TokenError, IndentationError) as e:
+        raise ExpressionError(f"Syntax error: {e}")
+    terms.append((sign, text[term_start:]))
+    sides.append((terms, None, text[side_start:]))
+    return sides
+
+
+def _is_number(node):
+    return isinstance(node, ast.Constant) and isinstance(node.value, (int, float))
+
+
+class _Lower(ast.NodeTransformer):
+    # sum(...) -> lpSum(...): one linear pass instead of pairwise "+" copies
+    def visit_Call(self, node):
+        self.generic_visit(node)
+        if isinstance(node.func, ast.Name) and node.func.id == 'sum':
+            node.func = ast.Name(id='__lpsum__', ctx=ast.Load())
+        return node
+
+    # a * b -> __mul__(a, b) unless both sides are number literals
+    def visit_BinOp(self, node):
+        self.generic_visit(node)
+        if not isinstance(node.op, ast.Mult) or (_is_number(node.left) and _is_number(node.right)):
+            return node
+        return ast.Call(func=ast.Name(id='__mul__', ctx=ast.Load()), args=[node.left, node.right], keywords=[])
+
+    # for x in it -> for x in __iter__(it): counts against the line's budget
+    def visit_comprehension(self, node):
+        self.generic_visit(node)
+        node.iter = ast.Call(func=ast.Name(id='__iter__', ctx=ast.Load()), args=[node.iter], keywords=[])
+        return node
+
+
+def _side_node(terms, source):
+    if len(terms) < FLATTEN_MIN_TERMS:
+        return _parse(source)
+    elts = []
+    for sign, term in terms:
+        node = _parse(term)
+        elts.append(node if sign > 0 else ast.UnaryOp(op=ast.USub(), operand=node))
+    return ast.Call(func=ast.Name(id='__lpsum__', ctx=ast.Load()), args=[ast.List(elts=elts, ctx=ast.Load())], keywords=[])
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def compile_expr(text):
+    """
+    Parses one objective/constraint line, checks it against the whitelist
+    and returns a cached code object. Raises ExpressionError.
+    """
+    if not text or not text.strip():
+        raise ExpressionError("Empty expression")
+    text = text.strip()
+
+    sides = _split_top_level(text)
+    if sides is None:
+        body = _parse(text)
+    else:
+        if any(not t.strip() for terms, _, _ in sides for _, t in terms):
+            raise ExpressionError("Syntax error: missing operand")
+
+        # Rebuild each side from its own terms, then re-join the comparison
+        side_nodes = [_side_node(terms, side_text) for terms, _, side_text in sides]
+        body = side_nodes[0]
+        if len(side_nodes) > 1:
+            ops = {'<=': ast.LtE, '>=': ast.GtE, '==': ast.Eq, '<': ast.Lt, '>': ast.Gt, '!=': ast.NotEq}
+            body = ast.Compare(left=side_nodes[0], ops=[ops[op]() for _, op, _ in sides[:-1]], comparators=side_nodes[1:])
+
+    tree = ast.fix_missing_locations(ast.Expression(body=_Lower().visit(body)))
+    return compile(tree, '<model>', 'eval')
+
+
+def prepare(namespace):
+    """Locks a symbol table down for evaluate(): no builtins, only the safe calls."""
+    namespace['__builtins__'] = {}
+    namespace['__lpsum__'] = pulp.lpSum
+    namespace['__mul__'] = _mul
+    namespace.update(SAFE_CALLS)
+    return namespace
+
+
+def evaluate(text, namespace):
+    namespace['__iter__'] = _iteration_budget(MAX_ITERATIONS)
+    return eval(compile_expr(text), namespace)
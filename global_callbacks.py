@@ -1,16 +1,61 @@
 # global_callbacks.py
 from dash import Input, Output, State, callback_context, no_update, dcc, html
+import uuid
+import flask
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
 import solver_engine
 import bridge_logic
+import solver_pool
 import modules.cutting.analytics as cut_analytics
+import modules.cutting.logic as cut_logic
+import modules.schedule.analytics as sched_analytics
+import modules.inventory.analytics as inv_analytics
+import modules.cutting.remnants as remnants
 from common.styles import *
 
+def render_results(mode, res, store):
+    """Template-specific chart, job table and insight text for one solution."""
+    if mode == 'cutting': return cut_analytics.process_results(res, store)
+    if mode == 'schedule': return sched_analytics.process_results(res, store)
+    if mode == 'inventory': return inv_analytics.process_results(res, store)
+
+    fig = {}
+    table_rows = [{'Stock': v['Variable'], 'Plan': '-', 'Usage': v['Value']} for v in res['variables'] if v['Value'] > 0]
+    df = pd.DataFrame(res['variables'])
+    if not df.empty:
+        df = df[df['Value'] > 0]
+    if not df.empty:
+        fig = px.bar(df, x='Variable', y='Value', title='Optimization Results')
+    return fig, table_rows, "Optimization complete."
+
+def solve(mode, store, sense, obj, const, pool_size=1, pool_gap=0.05):
+    """Native engine for the template if there is one, else the generic model."""
+    res = bridge_logic.solve_native(mode, store, pool_size=pool_size, pool_gap=pool_gap)
+    if res is None:
+        res = solver_engine.solve_model(store, sense, obj, const, pool_size=pool_size, pool_gap=pool_gap)
+    return res
+
+def client_id():
+    """
+    Solver pool tenant of the current request: the client address as the
+    server sees it (behind a proxy, see OPTIMYSTIC_TRUSTED_PROXIES in app.py),
+    never a value the browser could choose.
+    """
+    return flask.request.remote_addr or 'anonymous'
+
+def plan_result(plan):
+    """A stored plan (see run_solver's pool_data) as a solver result for render_results."""
+    res = {'status': 'Optimal', 'objective': plan['objective'], 'variables': plan['variables'], 'constraints': []}
+    if plan.get('bar_numbers'): res['bar_numbers'] = plan['bar_numbers']
+    return res
+
 def init_callbacks(app):
     print("   - [System] Global Callbacks Initialized")
 
+    # --- 0. Session id (tenant key of the solver pool) ---
+
     # --- 1. Add Row Callbacks (단순 행 추가 기능들) ---
     @app.callback(Output('cut-stock-table', 'data'), Input('btn-add-stock', 'n_clicks'), State('cut-stock-table', 'data'), prevent_initial_call=True)
     def add_stock_row(n, data): return (data or []) + [{'Name': f'Stock_{len(data or [])+1}', 'Length': 5000, 'Cost': 50, 'Limit': 100}]
@@ -34,7 +79,7 @@ def init_callbacks(app):
     def add_dest_row(n, data): return (data or []) + [{'Dst': f'S{len(data or [])+1}', 'Dem': 100}]
 
     @app.callback(Output('inv-table', 'data'), Input('btn-add-inv', 'n_clicks'), State('inv-table', 'data'), prevent_initial_call=True)
-    def add_inv_row(n, data): return (data or []) + [{'Item': f'Item_{len(data or [])+1}', 'Demand': 100, 'Cost': 10}]
+    def add_inv_row(n, data): return (data or []) + [{'Item': f'Item_{len(data or [])+1}', 'Demand': 1000, 'Cost': 10, 'OrderCost': 50, 'Holding': 25, 'LeadTime': 7, 'StdDev': 2, 'Space': 0}]
 
     @app.callback(Output('invest-table', 'data'), Input('btn-add-invest', 'n_clicks'), State('invest-table', 'data'), prevent_initial_call=True)
     def add_invest_row(n, data): return (data or []) + [{'Project': f'Proj_{len(data or [])+1}', 'Cost': 10000, 'Return': 15000}]
@@ -43,23 +88,24 @@ def init_callbacks(app):
     def add_pm_res_row(n, data, cols): return (data or []) + [{c['id']: (f"Res_{len(data)+1}" if c['id'] == 'resource' else 0) for c in cols}]
 
     @app.callback(Output('sched-matrix', 'data'), Input('btn-add-staff', 'n_clicks'), State('sched-matrix', 'data'), State('sched-matrix', 'columns'), prevent_initial_call=True)
-    def add_sched_staff_row(n, data, cols): return (data or []) + [{c['id']: (f"Staff_{len(data)+1}" if c['id'] == 'staff' else 0) for c in cols}]
+    def add_sched_staff_row(n, data, cols): return (data or []) + [{c['id']: (f"Staff_{len(data or [])+1}" if c['id'] == 'staff' else 1) for c in cols}]
 
     # --- 2. Data Sync Logic (Bridge) ---
     @app.callback(
-        [Output('solver-objective', 'value'), Output('solver-constraints', 'value'), Output('all-data-store', 'data')],
-        [Input('cut-table', 'data'), Input('cut-stock-table', 'data'), Input('input-kerf', 'value'),
-         Input('pack-table', 'data'), Input('blend-table', 'data'), Input('pm-products-table', 'data'), Input('pm-resource-matrix', 'data'), Input('sched-matrix', 'data'), Input('trans-supply', 'data'), Input('trans-demand', 'data'), Input('trans-cost-matrix', 'data'), Input('inv-table', 'data'), Input('invest-table', 'data'),
-         Input('solver-sense', 'value'), Input('url', 'pathname')]
+        [Output('solver-objective', 'value'), Output('solver-constraints', 'value'), Output('all-data-store', 'data'),
+         Output('solver-objective', 'readOnly'), Output('solver-constraints', 'readOnly'), Output('solver-model-note', 'children')],
+        [Input('cut-table', 'data'), Input('cut-stock-table', 'data'), Input('input-kerf', 'value'), Input('input-remnants', 'value'), Input('input-setup-cost', 'value'), Input('input-setup-time', 'value'),
+         Input('pack-table', 'data'), Input('blend-table', 'data'), Input('pm-products-table', 'data'), Input('pm-resource-matrix', 'data'), Input('sched-matrix', 'data'), Input('sched-demand', 'data'), Input('sched-weeks', 'value'), Input('sched-shift-hours', 'value'), Input('sched-max-hours', 'value'), Input('sched-max-consec', 'value'), Input('trans-supply', 'data'), Input('trans-demand', 'data'), Input('trans-cost-matrix', 'data'), Input('inv-table', 'data'), Input('inv-service', 'value'), Input('inv-capacity', 'value'), Input('inv-budget', 'value'), Input('invest-table', 'data'),
+         Input('solver-sense', 'value'), Input('url', 'pathname'), Input('remnant-rev', 'data')]
     )
-    def sync_bridge_data(cut_data, stock_data, kerf_val,
-                         pack_data, blend_data, pm_prod, pm_res, sched_data, trans_src, trans_dst, trans_cost, inv_data, invest_data, sense, pathname):
+    def sync_bridge_data(cut_data, stock_data, kerf_val, remnants_val, setup_cost, setup_time,
+                         pack_data, blend_data, pm_prod, pm_res, sched_data, sched_demand, sched_weeks, sched_shift, sched_max_hours, sched_max_consec, trans_src, trans_dst, trans_cost, inv_data, inv_service, inv_capacity, inv_budget, invest_data, sense, pathname, remnant_rev):
         mode = pathname.strip('/') if pathname else ''
         params = {}
         param_list = []
         
         if mode == 'cutting':
-            data_inputs = {'cut_table': cut_data, 'cut_stock_table': stock_data, 'kerf_val': kerf_val}
+            data_inputs = {'cut_table': cut_data, 'cut_stock_table': stock_data, 'kerf_val': kerf_val, 'remnants_val': remnants_val, 'setup_cost': setup_cost, 'setup_time': setup_time}
             params, param_list = cut_analytics.get_params(data_inputs, sense)
         
         elif mode == 'packing':
@@ -93,16 +139,11 @@ def init_callbacks(app):
             params = {'Plants': plants, 'Regions': regions, 'Supply': supply, 'Demand': demand}
             param_list = [{'name':'Supply', 'shape':'dict', 'data':supply}, {'name':'Demand', 'shape':'dict', 'data':demand}]
         elif mode == 'schedule':
-            if not sched_data: sched_data = []
-            staff = [r['Staff'] for r in sched_data if r.get('Staff')]
-            params = {'Staff': staff}
-            param_list = []
+            data_inputs = {'sched_matrix': sched_data, 'sched_demand': sched_demand, 'weeks': sched_weeks, 'shift_hours': sched_shift, 'max_hours': sched_max_hours, 'max_consec': sched_max_consec}
+            params, param_list = sched_analytics.get_params(data_inputs)
         elif mode == 'inventory':
-            if not inv_data: inv_data = []
-            items = [r['Item'] for r in inv_data if r.get('Item')]
-            demand = {r['Item']: float(r['Demand']) for r in inv_data if r.get('Item')}
-            params = {'Items': items, 'Demand': demand}
-            param_list = [{'name':'Demand', 'shape':'dict', 'data':demand}]
+            data_inputs = {'inv_table': inv_data, 'service': inv_service, 'capacity': inv_capacity, 'budget': inv_budget}
+            params, param_list = inv_analytics.get_params(data_inputs)
         elif mode == 'investment':
             if not invest_data: invest_data = []
             projects = [r['Project'] for r in invest_data if r.get('Project')]
@@ -112,18 +153,19 @@ def init_callbacks(app):
             param_list = [{'name':'Cost', 'shape':'dict', 'data':cost}, {'name':'Return', 'shape':'dict', 'data':ret}]
 
         obj, const, vars_config = bridge_logic.generate_logic(mode, params)
-        return obj, const, {'variables': vars_config, 'parameters': param_list}
+        read_only, note = bridge_logic.model_note(mode, params)
+        return obj, const, {'variables': vars_config, 'parameters': param_list}, read_only, read_only, note
 
     # --- 3. Run Solver Logic ---
     @app.callback(
         [Output('result-dashboard', 'style'), Output('res-status', 'children'), Output('res-status', 'style'), 
          Output('res-objective', 'children'), Output('res-obj-label', 'children'),
-         Output('res-table', 'data'), Output('res-constraints-table', 'data'), Output('res-chart', 'figure'), Output('res-insight-card', 'style'), Output('res-insight-text', 'children'), Output('solver-error-msg', 'children'), Output('solver-error-msg', 'style'), Output('constraints-wrapper', 'style'), Output('main-tabs', 'value')],
+         Output('res-table', 'data'), Output('res-constraints-table', 'data'), Output('res-chart', 'figure'), Output('res-insight-card', 'style'), Output('res-insight-text', 'children'), Output('solver-error-msg', 'children'), Output('solver-error-msg', 'style'), Output('constraints-wrapper', 'style'), Output('main-tabs', 'value'), Output('res-pool-store', 'data')],
         [Input('btn-solve', 'n_clicks')],
-        [State('solver-sense', 'value'), State('solver-objective', 'value'), State('solver-constraints', 'value'), State('all-data-store', 'data'), State('main-tabs', 'value'), State('url', 'pathname')]
+        [State('solver-sense', 'value'), State('solver-objective', 'value'), State('solver-constraints', 'value'), State('all-data-store', 'data'), State('main-tabs', 'value'), State('url', 'pathname'), State('solver-pool-size', 'value'), State('solver-pool-gap', 'value')]
     )
-    def run_solver(n, sense, obj, const, store, current_tab, pathname):
-        if n == 0 or not obj: return {'display':'none'}, "-", {}, "-", "Total Objective", [], [], {}, {'display':'none'}, "", "", {'display':'none'}, {'display':'block'}, no_update
+    def run_solver(n, sense, obj, const, store, current_tab, pathname, pool_size, pool_gap):
+        if n == 0 or not obj: return {'display':'none'}, "-", {}, "-", "Total Objective", [], [], {}, {'display':'none'}, "", "", {'display':'none'}, {'display':'block'}, no_update, None
         
         # Validation Logic
         params_dict = {p['name']: p['data'] for p in store['parameters']}
@@ -135,38 +177,137 @@ def init_callbacks(app):
                 if kerf >= max_stock:
                     error_msg = f"❌ **Critical Error:**\nBlade Width ({kerf} mm) is larger than your longest stock ({max_stock} mm).\n\nPlease reduce the blade width."
                     error_style = {'display':'block', 'color': '#a94442', 'backgroundColor': '#f2dede', 'border': '1px solid #ebccd1', 'borderRadius': '12px', 'padding': '25px', 'whiteSpace': 'pre-wrap', 'fontWeight': 'bold', 'marginTop': '30px'}
-                    return {'display':'none'}, "Error", {'color':'#a94442'}, "-", "Error", [], [], {}, {'display':'none'}, "", dcc.Markdown(error_msg), error_style, {'display':'none'}, "tab-3"
+                    return {'display':'none'}, "Error", {'color':'#a94442'}, "-", "Error", [], [], {}, {'display':'none'}, "", dcc.Markdown(error_msg), error_style, {'display':'none'}, "tab-3", None
 
         mode = pathname.strip('/') if pathname else ''
-        res = solver_engine.solve_model(store, sense, obj, const)
+        pool_size = max(1, min(int(pool_size or 1), 10))
+        pool_gap = max(float(pool_gap or 0), 0) / 100
+        try:
+            # Bounded, per-client fair solver slots; a full queue answers at once
+            res = solver_pool.POOL.run(client_id(), solve, mode, store, sense, obj, const, pool_size, pool_gap)
+        except solver_pool.PoolBusy as e:
+            busy_style = {'display':'block', 'backgroundColor': '#fff8e1', 'border': '1px solid #ffe082', 'borderRadius': '12px', 'padding': '25px', 'whiteSpace': 'pre-wrap', 'fontWeight': '500', 'marginBottom': '30px', 'marginTop': '30px', 'color': '#7a5b00'}
+            busy_msg = dcc.Markdown(f"### ⏳ Solver Busy\nAll solver slots are taken ({e}). Please press Run again in a moment.")
+            return {'display':'none'}, "Busy", {'color':'#7a5b00'}, "-", "Busy", [], [], {}, {'display':'none'}, "", busy_msg, busy_style, {'display':'block'}, "tab-3", None
         
         if res.get('status') == 'Infeasible':
              blue_alert_style = {'display':'block', 'backgroundColor': '#e3f2fd', 'border': '1px solid #b6d4fe', 'borderRadius': '12px', 'padding': '25px', 'whiteSpace': 'pre-wrap', 'fontWeight': '500', 'marginBottom': '30px', 'marginTop': '30px', 'color': '#084298'}
              friendly_error = dcc.Markdown(res.get('error_msg')) 
-             return {'display':'none'}, "Infeasible", {'color':'#a94442'}, "-", "Error", [], [], {}, {'display':'none'}, "", friendly_error, blue_alert_style, {'display':'block'}, "tab-3"
+             return {'display':'none'}, "Infeasible", {'color':'#a94442'}, "-", "Error", [], [], {}, {'display':'none'}, "", friendly_error, blue_alert_style, {'display':'block'}, "tab-3", None
 
         if res.get('status') == 'Error':
             error_style = {'display':'block', 'color': '#c0392b', 'backgroundColor': '#fceae9', 'border': '1px solid #f5c6cb', 'borderRadius': '12px', 'padding': '25px', 'whiteSpace': 'pre-wrap', 'fontWeight': '500', 'marginBottom': '30px', 'marginTop': '30px'}
             friendly_error = html.Code(res.get('error_msg'), style={'backgroundColor': 'rgba(255,255,255,0.7)', 'padding': '10px', 'borderRadius': '4px', 'display': 'block', 'fontSize': '13px', 'fontFamily': 'monospace'})
-            return {'display':'none'}, "Error", {'color':'#dc3545'}, "-", "Error", [], [], {}, {'display':'none'}, "", friendly_error, error_style, {'display':'block'}, "tab-3"
+            return {'display':'none'}, "Error", {'color':'#dc3545'}, "-", "Error", [], [], {}, {'display':'none'}, "", friendly_error, error_style, {'display':'block'}, "tab-3", None
         
-        fig = {}
-        table_rows = []
-        insight = "Optimization complete."
         obj_label = "Total Cost ($)" if sense == 'minimize' else "Total Profit ($)"
+        obj_text = f"${res['objective']:,.2f}"
         constraints_display = {'flex': 1} 
 
-        if mode == 'cutting':
+        if mode in ('cutting', 'schedule'):
             constraints_display = {'display': 'none'}
-            fig, table_rows, insight = cut_analytics.process_results(res, store)
-        else:
-            table_rows = [{'Stock': v['Variable'], 'Plan': '-', 'Usage': v['Value']} for v in res['variables'] if v['Value'] > 0]
-            df = pd.DataFrame(res['variables'])
-            df = df[df['Value'] > 0]
-            if not df.empty:
-                fig = px.bar(df, x='Variable', y='Value', title='Optimization Results')
+        if mode == 'schedule':
+            obj_label, obj_text = "Scheduled Hours", f"{res['objective']:,.1f} h"
+        elif mode == 'inventory':
+            obj_label = "Annual Cost ($)"
+        fig, table_rows, insight = render_results(mode, res, store)
+
+        # Plans stay in the browser with the parameters they were solved with
+        # (bar/stock indices refer to those); switching never re-solves, and the
+        # remnant inventory only changes when one of them is committed (once per solve)
+        pool_data = {'mode': mode, 'token': uuid.uuid4().hex, 'parameters': store['parameters'],
+                     'inventory': bool(mode == 'cutting' and params_dict.get('UseRemnants')),
+                     'plans': res.get('pool') or [{'objective': res['objective'], 'variables': res['variables']}]}
 
         status_style = {'color':'#333'}
         insight_style = {'display':'block', 'backgroundColor': '#e3f2fd', 'padding': '25px', 'borderRadius': '12px', 'marginBottom': '40px', 'marginTop': '20px'}
         
-        return {'display':'block'}, res['status'], status_style, f"${res['objective']:,.2f}", obj_label, table_rows, res['constraints'], fig, insight_style, insight, "", {'display':'none'}, constraints_display, "tab-3"
+        # Hidden constraint tables are not shipped to the browser
+        constraint_rows = [] if mode in ('cutting', 'schedule') else res['constraints']
+        return {'display':'block'}, res['status'], status_style, obj_text, obj_label, table_rows, constraint_rows, fig, insight_style, insight, "", {'display':'none'}, constraints_display, "tab-3", pool_data
+
+    # --- 4. Solution Pool (switch between alternative plans) ---
+    @app.callback(
+        [Output('res-pool-select', 'options'), Output('res-pool-select', 'value'), Output('res-pool-wrapper', 'style'),
+         Output('res-commit-wrapper', 'style'), Output('res-commit-msg', 'children'), Output('res-reopt-wrapper', 'style')],
+        Input('res-pool-store', 'data'), prevent_initial_call=True
+    )
+    def show_pool(pool_data):
+        if not pool_data: return [], None, {'display': 'none'}, {'display': 'none'}, "", {'display': 'none'}
+        commit_style = {'display': 'block', 'marginBottom': '30px'} if pool_data.get('inventory') else {'display': 'none'}
+        reopt_style = {'display': 'block', 'marginBottom': '30px'} if pool_data['mode'] == 'cutting' else {'display': 'none'}
+        if len(pool_data['plans']) < 2: return [], None, {'display': 'none'}, commit_style, "", reopt_style
+        best = pool_data['plans'][0]['objective']
+        options = []
+        for k, plan in enumerate(pool_data['plans']):
+            label = "Plan 1 (optimal)" if k == 0 else f"Plan {k+1} ({plan['objective'] - best:+,.2f})"
+            options.append({'label': label, 'value': k})
+        return options, 0, {'display': 'block', 'marginBottom': '30px'}, commit_style, "", reopt_style
+
+    @app.callback(
+        [Output('res-objective', 'children', allow_duplicate=True), Output('res-table', 'data', allow_duplicate=True),
+         Output('res-chart', 'figure', allow_duplicate=True), Output('res-insight-text', 'children', allow_duplicate=True)],
+        Input('res-pool-select', 'value'), State('res-pool-store', 'data'), prevent_initial_call=True
+    )
+    def switch_plan(k, pool_data):
+        if k is None or not pool_data or k >= len(pool_data['plans']): return no_update, no_update, no_update, no_update
+        plan = pool_data['plans'][k]
+        fig, table_rows, insight = render_results(pool_data['mode'], plan_result(plan), {'parameters': pool_data['parameters']})
+        return f"${plan['objective']:,.2f}", table_rows, fig, insight
+
+    # --- 5. Commit Plan (the only write to the remnant inventory) ---
+    @app.callback(
+        [Output('res-commit-msg', 'children', allow_duplicate=True), Output('res-commit-store', 'data'), Output('remnant-rev', 'data')],
+        Input('btn-commit-plan', 'n_clicks'),
+        [State('res-pool-store', 'data'), State('res-pool-select', 'value'), State('res-commit-store', 'data'), State('remnant-rev', 'data')],
+        prevent_initial_call=True
+    )
+    def commit_plan(n, pool_data, k, committed, rev):
+        if not n or not pool_data or not pool_data.get('inventory'): return no_update, no_update, no_update
+        if committed == pool_data['token']:
+            return "This solve has already been committed. Run the solver again for a new plan.", no_update, no_update
+        k = k or 0
+        used, offcuts = cut_analytics.inventory_changes(plan_result(pool_data['plans'][k]), {'parameters': pool_data['parameters']})
+        try:
+            consumed, stored = remnants.get_store().commit_plan(used, offcuts)
+        except remnants.StalePlan as e:
+            return f"❌ **Not committed:** {e}. Run the solver again.", no_update, (rev or 0) + 1
+        except Exception as e:
+            print(f"[Remnants] Could not update inventory: {e}")
+            return f"❌ **Not committed:** remnant inventory unavailable ({e}).", no_update, no_update
+        msg = f"✅ **Plan {k+1} committed:** `{consumed}` remnants reused, `{stored}` new offcuts stored."
+        return msg, pool_data['token'], (rev or 0) + 1
+
+    # --- 6. Re-optimize (rush order after part of the plan is cut) ---
+    @app.callback(
+        [Output('res-reopt-msg', 'children'), Output('res-pool-store', 'data', allow_duplicate=True),
+         Output('res-objective', 'children', allow_duplicate=True), Output('res-table', 'data', allow_duplicate=True),
+         Output('res-chart', 'figure', allow_duplicate=True), Output('res-insight-text', 'children', allow_duplicate=True)],
+        Input('btn-reopt', 'n_clicks'),
+        [State('reopt-bars', 'value'), State('res-pool-store', 'data'), State('res-pool-select', 'value'), State('all-data-store', 'data')],
+        prevent_initial_call=True
+    )
+    def reoptimize(n, bars_text, pool_data, k, store):
+        if not n or not pool_data or pool_data['mode'] != 'cutting': return (no_update,) * 6
+        try:
+            bars_done = cut_logic.parse_bars(bars_text)
+        except ValueError as e:
+            return f"❌ **Bars Already Cut:** {e}.", no_update, no_update, no_update, no_update, no_update
+        plan = pool_data['plans'][k or 0]
+        prev_params = {p['name']: p['data'] for p in pool_data['parameters']}
+        try:
+            res = solver_pool.POOL.run(client_id(), cut_logic.reoptimize_plan, plan_result(plan), prev_params, store, bars_done)
+        except solver_pool.PoolBusy as e:
+            return f"⏳ **Solver busy** ({e}). Please try again in a moment.", no_update, no_update, no_update, no_update, no_update
+        if res.get('status') in ('Infeasible', 'Error'):
+            return f"❌ **Not re-optimized:** {res.get('error_msg')}", no_update, no_update, no_update, no_update, no_update
+
+        # The re-optimized plan replaces the pool; its bar numbers travel with it.
+        # Same job, same token: a committed plan is not committed a second time
+        new_plan = {'objective': res['objective'], 'variables': res['variables'], 'bar_numbers': res['bar_numbers']}
+        params_dict = {p['name']: p['data'] for p in store['parameters']}
+        new_pool = {'mode': 'cutting', 'token': pool_data['token'], 'parameters': store['parameters'],
+                    'inventory': bool(params_dict.get('UseRemnants')), 'plans': [new_plan]}
+        fig, table_rows, insight = render_results('cutting', plan_result(new_plan), store)
+        msg = f"🔁 **Re-optimized:** `{len(bars_done)}` cut bars kept, `{res['changes']}` assignments changed."
+        return msg, new_pool, f"${res['objective']:,.2f}", table_rows, fig, insight
@@ -0,0 +1,321 @@
+# load_test.py
+"""
+Load test for the Dash callbacks, end-to-end and without external services.
+
+Simulated users replay template sessions against app.server through
+Dash's /_dash-update-component endpoint (Flask test client):
+open the template, edit the input table a few times (each edit re-runs
+sync_bridge_data), then press Run (run_solver).
+
+    python load_test.py --templates cutting --users 20 --sessions 100
+    python load_test.py --templates cutting,schedule,inventory --users 50 --processes 4 --json report.json
+    python load_test.py --templates inventory --rows 2000 --max-p99 500   # exit 1 if any callback p99 > 500 ms
+
+Reports per callback: throughput, latency percentiles, request/response
+sizes, memory and outcomes (Optimal / Busy / Error ...), plus peak memory
+and solver pool metrics for every worker process.
+
+Callback memory is the growth of the process RSS across the call (Linux)
+and, with --tracemalloc, the Python heap peak above the heap at its start.
+Both are per process, so they are exact with --users 1; with concurrent
+users they include whatever ran alongside. CBC runs in a child process
+and is not counted.
+"""
+import argparse
+import contextlib
+import itertools
+import json
+import multiprocessing
+import os
+import random
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+
+# template -> (table the user edits, table grown by --rows)
+# prod_mix and blending are left out until their bridges solve (they always
+# answer Error today, which would skew the run_solver latencies)
+TEMPLATES = {
+    'cutting': ('cut-table', 'cut-table'),
+    'schedule': ('sched-demand', 'sched-matrix'),
+    'inventory': ('inv-table', 'inv-table'),
+}
+# Callbacks under test, found in app.callback_map by one of their outputs
+CALLBACKS = {'sync_bridge_data': 'all-data-store.data', 'run_solver': 'res-status.children'}
+ENDPOINT = '/_dash-update-component'
+
+
+# --- Session replay ---
+def _callback_specs(dash_app):
+    specs = {}
+    for name, output in CALLBACKS.items():
+        key = next(k for k in dash_app.callback_map if f".{output}." in f".{k}.")
+        cb = dash_app.callback_map[key]
+        specs[name] = {
+            'key': key,
+            'outputs': [{'id': o.component_id, 'property': o.component_property} for o in cb['output']],
+            'inputs': cb['inputs'], 'state': cb['state']
+        }
+    return specs
+
+
+def _layout_values(app_module, mode):
+    # Every prop the callbacks read, with the template's own defaults
+    values = {}
+    for c in app_module.render_workspace(mode)._traverse():
+        cid = getattr(c, 'id', None)
+        if not isinstance(cid, str): continue
+        for prop in ('data', 'value', 'n_clicks'):
+            if prop in c.available_properties and hasattr(c, prop):
+                values[f"{cid}.{prop}"] = getattr(c, prop)
+    values['url.pathname'] = f"/{mode}"
+    return values
+
+
+def _grow_table(rows, n):
+    # Copies of the default rows with unique labels (the first text column)
+    if not rows or n <= len(rows): return rows
+    out = []
+    for k in range(n):
+        row = dict(rows[k % len(rows)])
+        label = next((c for c, v in row.items() if isinstance(v, str)), None)
+        if label and k >= len(rows): row[label] = f"{row[label]}_{k}"
+        out.append(row)
+    return out
+
+
+def _edit_table(rows, rng):
+    # One cell edit: a numeric value scaled by +-25%
+    rows = [dict(r) for r in rows]
+    if not rows: return rows
+    row = rng.choice(rows)
+    cols = [c for c, v in row.items() if isinstance(v, (int, float)) and not isinstance(v, bool) and v]
+    if cols:
+        c = rng.choice(cols)
+        new = row[c] * rng.uniform(0.75, 1.25)
+        row[c] = max(1, round(new)) if isinstance(row[c], int) else round(new, 3)
+    return rows
+
+
+def _rss_mb():
+    # Current resident set of this process (Linux), None elsewhere
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 2**20
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def _call(client, spec, values, changed, samples, name):
+    payload = {
+        'output': spec['key'], 'outputs': spec['outputs'],
+        'inputs': [{**i, 'value': values.get(f"{i['id']}.{i['property']}")} for i in spec['inputs']],
+        'state': [{**s, 'value': values.get(f"{s['id']}.{s['property']}")} for s in spec['state']],
+        'changedPropIds': [changed]
+    }
+    body = json.dumps(payload).encode()
+    tracing = tracemalloc.is_tracing()
+    if tracing:
+        tracemalloc.reset_peak()
+        heap0 = tracemalloc.get_traced_memory()[0]
+    rss0 = _rss_mb()
+    t0 = time.perf_counter()
+    resp = client.post(ENDPOINT, data=body, content_type='application/json')
+    elapsed = time.perf_counter() - t0
+    rss1 = _rss_mb()
+    heap_peak = (tracemalloc.get_traced_memory()[1] - heap0) / 2**20 if tracing else None
+    data = resp.get_data()
+
+    response, outcome = {}, f"HTTP {resp.status_code}"
+    if resp.status_code == 200:
+        response = json.loads(data).get('response', {})
+        outcome = str(response.get('res-status', {}).get('children', 'ok'))
+    samples.append({'callback': name, 'latency': elapsed, 'request_bytes': len(body), 'response_bytes': len(data), 'outcome': outcome,
+                    'rss_growth_mb': None if rss0 is None or rss1 is None else rss1 - rss0, 'heap_peak_mb': heap_peak})
+    return response
+
+
+def run_session(app_module, client, specs, mode, rows, edits, rng, samples):
+    edit_table, grow_table = TEMPLATES[mode]
+    values = _layout_values(app_module, mode)
+    key = f"{grow_table}.data"
+    values[key] = _grow_table(values.get(key), rows)
+
+    def sync(changed):
+        out = _call(client, specs['sync_bridge_data'], values, changed, samples, 'sync_bridge_data')
+        for cid, props in out.items():
+            for prop, v in props.items(): values[f"{cid}.{prop}"] = v
+
+    # 1. Open the template, 2. edit inputs, 3. solve
+    sync('url.pathname')
+    for _ in range(edits):
+        values[f"{edit_table}.data"] = _edit_table(values.get(f"{edit_table}.data"), rng)
+        sync(f"{edit_table}.data")
+    values['btn-solve.n_clicks'] = 1
+    _call(client, specs['run_solver'], values, 'btn-solve.n_clicks', samples, 'run_solver')
+
+
+# --- One worker process ---
+def _peak_rss_mb():
+    try:
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024   # KB on Linux
+    except (ImportError, AttributeError):
+        return None
+
+
+def run_worker(opts):
+    """Runs opts['sessions'] sessions with opts['users'] concurrent users in this process."""
+    # Keep the test away from the real remnant inventory, model cache and
+    # solver temp files (set before the app is imported; overrides the host's)
+    os.environ['OPTIMYSTIC_REMNANT_DB'] = os.path.join(opts['scratch'], 'remnants.db')
+    os.environ['OPTIMYSTIC_MODEL_CACHE'] = os.path.join(opts['scratch'], 'model_cache')
+    os.environ['OPTIMYSTIC_SESSION_DIR'] = os.path.join(opts['scratch'], 'sessions')
+    os.environ['OPTIMYSTIC_SLOT_DIR'] = os.path.join(opts['scratch'], 'slots')
+    if opts['tracemalloc']: tracemalloc.start()
+    with open(os.devnull, 'w') as devnull, (contextlib.nullcontext() if opts['verbose'] else contextlib.redirect_stdout(devnull)):
+        return _run_sessions(opts)
+
+
+def _run_sessions(opts):
+    import app as app_module
+    import solver_pool
+
+    specs = _callback_specs(app_module.app)
+    samples = []
+    local = threading.local()
+    seed = opts['seed'] + os.getpid()
+
+    users = itertools.count()
+
+    def one(k):
+        if not hasattr(local, 'client'):
+            # Each simulated user is its own client address (the solver pool's tenant)
+            user = next(users)
+            local.client = app_module.server.test_client()
+            local.client.environ_base['REMOTE_ADDR'] = f"10.{os.getpid() % 256}.{user // 256 % 256}.{user % 256}"
+        rng = random.Random(seed + k)
+        mode = opts['templates'][k % len(opts['templates'])]
+        run_session(app_module, local.client, specs, mode, opts['rows'], opts['edits'], rng, samples)
+
+    t0 = time.time()
+    with ThreadPoolExecutor(max_workers=opts['users']) as pool:
+        list(pool.map(one, range(opts['sessions'])))
+    wall = time.time() - t0
+
+    traced = tracemalloc.get_traced_memory()[1] / 2**20 if tracemalloc.is_tracing() else None
+    return {
+        'pid': os.getpid(), 'wall': wall, 'samples': samples,
+        'memory': {'peak_rss_mb': _peak_rss_mb(), 'traced_peak_mb': traced},
+        'solver_pool': solver_pool.POOL.stats()
+    }
+
+
+# --- Report ---
+def _memory_stats(values):
+    values = [v for v in values if v is not None]
+    if not values: return None
+    p50, p99 = np.percentile(values, [50, 99])
+    return {'p50': round(float(p50), 2), 'p99': round(float(p99), 2), 'max': round(float(max(values)), 2)}
+
+
+def summarize(workers, wall):
+    samples = [s for w in workers for s in w['samples']]
+    report = {'wall_s': round(wall, 3), 'requests': len(samples), 'callbacks': {}, 'workers': []}
+    for name in CALLBACKS:
+        mine = [s for s in samples if s['callback'] == name]
+        if not mine: continue
+        lat = np.array([s['latency'] for s in mine]) * 1000
+        outcomes = {}
+        for s in mine: outcomes[s['outcome']] = outcomes.get(s['outcome'], 0) + 1
+        p50, p90, p99 = np.percentile(lat, [50, 90, 99])
+        report['callbacks'][name] = {
+            'calls': len(mine), 'per_s': round(len(mine) / wall, 2),
+            'p50_ms': round(float(p50), 1), 'p90_ms': round(float(p90), 1), 'p99_ms': round(float(p99), 1), 'max_ms': round(float(lat.max()), 1),
+            'request_kb': round(float(np.mean([s['request_bytes'] for s in mine])) / 1024, 1),
+            'response_kb': round(float(np.mean([s['response_bytes'] for s in mine])) / 1024, 1),
+            'rss_growth_mb': _memory_stats([s['rss_growth_mb'] for s in mine]),
+            'heap_peak_mb': _memory_stats([s['heap_peak_mb'] for s in mine]),
+            'outcomes': outcomes
+        }
+    for w in workers:
+        report['workers'].append({'pid': w['pid'], 'wall_s': round(w['wall'], 3), **w['memory'], 'solver_pool': w['solver_pool']})
+    return report
+
+
+def print_report(report, opts):
+    print(f"\nTemplates: {', '.join(opts['templates'])} | {opts['processes']} process(es) x {opts['users']} users | "
+          f"{opts['sessions']} sessions | {report['requests']} requests in {report['wall_s']:.2f}s")
+    print(f"{'callback':<18}{'calls':>7}{'req/s':>9}{'p50 ms':>9}{'p90 ms':>9}{'p99 ms':>9}{'max ms':>9}{'req KB':>9}{'resp KB':>9}  outcomes")
+    for name, c in report['callbacks'].items():
+        outcomes = ", ".join(f"{k} {v}" for k, v in sorted(c['outcomes'].items()))
+        print(f"{name:<18}{c['calls']:>7}{c['per_s']:>9}{c['p50_ms']:>9}{c['p90_ms']:>9}{c['p99_ms']:>9}{c['max_ms']:>9}{c['request_kb']:>9}{c['response_kb']:>9}  {outcomes}")
+    print(f"\n{'callback memory':<18}{'RSS growth MB p50/p99/max':>28}{'heap peak MB p50/p99/max':>28}")
+    for name, c in report['callbacks'].items():
+        fmt = lambda m: f"{m['p50']:.2f} / {m['p99']:.2f} / {m['max']:.2f}" if m else "n/a"
+        print(f"{name:<18}{fmt(c['rss_growth_mb']):>28}{fmt(c['heap_peak_mb']):>28}")
+    print("\nPer worker:")
+    for w in report['workers']:
+        pool = w['solver_pool']
+        rss = f"{w['peak_rss_mb']:.1f} MB" if w['peak_rss_mb'] is not None else "n/a"
+        traced = f", traced peak {w['traced_peak_mb']:.1f} MB" if w['traced_peak_mb'] is not None else ""
+        print(f"  pid {w['pid']}: peak RSS {rss}{traced} | solver pool {pool['workers']} slots ({pool['host_solves']} per host), "
+              f"rejected {pool['rejected'] + pool['timed_out']}, queue wait p50/p99 {pool['queue_wait_s']['p50']:.3f}/{pool['queue_wait_s']['p99']:.3f}s, "
+              f"solve p50/p99 {pool['solve_s']['p50']:.3f}/{pool['solve_s']['p99']:.3f}s")
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Load test for the OptiMystic Dash callbacks.")
+    ap.add_argument('--templates', default='cutting', help=f"comma-separated, from: {', '.join(TEMPLATES)}")
+    ap.add_argument('--users', type=int, default=10, help="concurrent users per process")
+    ap.add_argument('--sessions', type=int, default=50, help="sessions in total")
+    ap.add_argument('--processes', type=int, default=1, help="worker processes (like gunicorn workers)")
+    ap.add_argument('--edits', type=int, default=2, help="table edits per session before solving")
+    ap.add_argument('--rows', type=int, default=0, help="grow the template's main table to this many rows")
+    ap.add_argument('--seed', type=int, default=0)
+    ap.add_argument('--tracemalloc', action='store_true', help="also report traced Python heap peak (slower)")
+    ap.add_argument('--verbose', action='store_true', help="keep the app's own solver logs")
+    ap.add_argument('--json', help="write the full report to this file")
+    ap.add_argument('--max-p99', type=float, help="exit with status 1 if any callback's p99 (ms) is above this")
+    args = ap.parse_args(argv)
+
+    templates = [t.strip() for t in args.templates.split(',') if t.strip()]
+    unknown = [t for t in templates if t not in TEMPLATES]
+    if unknown: ap.error(f"unknown template(s): {', '.join(unknown)}")
+
+    processes = max(1, args.processes)
+    opts = {'templates': templates, 'users': max(1, args.users), 'processes': processes, 'edits': args.edits,
+            'rows': args.rows, 'seed': args.seed, 'tracemalloc': args.tracemalloc, 'verbose': args.verbose}
+    shares = [args.sessions // processes + (1 if p < args.sessions % processes else 0) for p in range(processes)]
+
+    # One scratch directory for all workers: they share the model cache like real ones
+    scratch = tempfile.mkdtemp(prefix='optimystic-load-')
+    t0 = time.time()
+    try:
+        if processes == 1:
+            workers = [run_worker({**opts, 'sessions': args.sessions, 'scratch': scratch})]
+        else:
+            with multiprocessing.get_context('spawn').Pool(processes) as pool:
+                workers = pool.map(run_worker, [{**opts, 'sessions': n, 'scratch': scratch} for n in shares])
+    finally:
+        shutil.rmtree(scratch, ignore_errors=True)
+    report = summarize(workers, time.time() - t0)
+
+    opts['sessions'] = args.sessions
+    print_report(report, opts)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'options': opts, **report}, f, indent=2)
+    if args.max_p99 is not None and any(c['p99_ms'] > args.max_p99 for c in report['callbacks'].values()):
+        print(f"\nFAIL: p99 above {args.max_p99} ms")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
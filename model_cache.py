@@ -0,0 +1,343 @@
+# model_cache.py
+import hashlib
+import json
+import os
+import re
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
+from array import array
+from collections import OrderedDict
+import numpy as np
+import pulp
+import var_blocks
+
+# Compiled structure of flat linear models ("3 * X + Y <= 10"), shared by all
+# worker processes as memory-mapped .npy files. Only the numbers change per solve.
+CACHE_DIR = os.environ.get('OPTIMYSTIC_MODEL_CACHE', os.path.join(tempfile.gettempdir(), 'optimystic_model_cache'))
+MAX_ENTRIES = 64     # structures kept on disk (least recently used are evicted)
+MEMO_SIZE = 8        # structures kept open per process
+MPS_CHUNK = 4096     # columns formatted per write
+
+# A numeric literal not glued to an identifier (digits in A_IT0_ST1_B2 are skipped)
+_LITERAL = re.compile(r"(?<![\w.])(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?")
+_TOKEN = re.compile(r"<=|>=|==|#|[A-Za-z_]\w*|[-+*]|\S")
+_CATS = {'Continuous': 0, 'Integer': 1, 'Binary': 2}
+_SENSES = {'<=': 'L', '>=': 'G', '==': 'E'}
+_OBJ, _CONST, _MATRIX, _RHS = range(4)
+_ARRAYS = ('names', 'cats', 'indptr', 'col_ptr', 'csc_rows', 'csc_order', 'slot_pos', 'slot_sign', 'base')
+_MARK_START = "    MARK      'MARKER'                 'INTORG'\n"
+_MARK_END = "    MARK      'MARKER'                 'INTEND'\n"
+
+_memo = OrderedDict()
+_memo_lock = threading.Lock()   # shared by the solver pool's request threads
+
+
+def _is_name(tok):
+    return tok[0].isalpha() or tok[0] == '_'
+
+
+def _side_terms(tokens):
+    """
+    One side of a templated line -> [(sign, var_name or None, has_literal)].
+    Accepted terms: #, NAME, # * NAME, NAME * #. Returns None for anything else.
+    """
+    terms, sign, i = [], 1, 0
+    while True:
+        if i < len(tokens) and tokens[i] in ('+', '-'):   # unary sign ("a + -3 * X")
+            sign = -sign if tokens[i] == '-' else sign
+            i += 1
+        t = tokens[i:i + 3]
+        if len(t) == 3 and t[1] == '*' and t[0] == '#' and _is_name(t[2]):
+            terms.append((sign, t[2], True)); i += 3
+        elif len(t) == 3 and t[1] == '*' and t[2] == '#' and _is_name(t[0]):
+            terms.append((sign, t[0], True)); i += 3
+        elif t and t[0] == '#':
+            terms.append((sign, None, True)); i += 1
+        elif t and _is_name(t[0]):
+            terms.append((sign, t[0], False)); i += 1
+        else:
+            return None
+        if i == len(tokens): return terms
+        if tokens[i] not in ('+', '-'): return None
+        sign = 1 if tokens[i] == '+' else -1
+        i += 1
+
+
+def _compile(template_lines, var_types):
+    """
+    Templated lines (objective first, '#' for every literal) -> structure
+    arrays, or None if the model is not a flat linear one over scalar variables.
+
+    Every number of the model lives in one vector: [objective coefs,
+    objective constant, matrix entries (CSR), right-hand sides]. Each literal
+    of the text is a slot (position, sign) in it; bare names add a fixed 1.
+    """
+    index, names, cats, senses = {}, [], [], []
+    indices, row_len = array('q'), []      # CSR columns, row by row
+    # Targets as parallel typed arrays (kind, a, b, sign): OBJ (j), CONST, MATRIX (row, slot in row), RHS (row)
+    slots = (array('b'), array('q'), array('q'), array('b'))
+    fixed = (array('b'), array('q'), array('q'), array('b'))
+
+    for line_no, line in enumerate(template_lines):
+        tokens = _TOKEN.findall(line)
+        cmp_at = [i for i, t in enumerate(tokens) if t in _SENSES]
+        if line_no == 0:
+            if cmp_at: return None
+            sides = [tokens]
+        else:
+            if len(cmp_at) != 1: return None
+            sides = [tokens[:cmp_at[0]], tokens[cmp_at[0] + 1:]]
+            r = len(senses)
+            senses.append(_SENSES[tokens[cmp_at[0]]])
+
+        local = {}     # this row: column -> slot in the row (repeated names share one entry)
+        for side_no, side in enumerate(sides):
+            terms = _side_terms(side)
+            if terms is None: return None
+            side_sign = 1 if side_no == 0 else -1
+            for sign, name, has_literal in terms:
+                if name is None:
+                    kind, a, b = (_CONST, 0, 0) if line_no == 0 else (_RHS, r, 0)
+                    sign = sign if line_no == 0 else -sign * side_sign
+                else:
+                    if name not in var_types: return None
+                    if name not in index:
+                        index[name] = len(names)
+                        names.append(name)
+                        cats.append(_CATS.get(var_types[name], 0))
+                    j = index[name]
+                    if line_no == 0:
+                        kind, a, b = _OBJ, j, 0
+                        local[j] = 0
+                    else:
+                        kind, a, b = _MATRIX, r, local.setdefault(j, len(local))
+                        sign = sign * side_sign
+                buf = slots if has_literal else fixed
+                buf[0].append(kind); buf[1].append(a); buf[2].append(b); buf[3].append(sign)
+        if not local: return None   # a line without variables
+        if line_no > 0:
+            indices.extend(local)
+            row_len.append(len(local))
+
+    # Resolve targets to positions in the value vector
+    n, m = len(names), len(senses)
+    indptr = np.zeros(m + 1, dtype=np.int64)
+    indptr[1:] = np.cumsum(row_len)
+    nnz = int(indptr[-1])
+    indices = np.frombuffer(indices, dtype=np.int64) if nnz else np.zeros(0, dtype=np.int64)
+
+    def positions(buf):
+        kind = np.frombuffer(buf[0], dtype=np.int8) if len(buf[0]) else np.zeros(0, dtype=np.int8)
+        a, b = (np.frombuffer(x, dtype=np.int64) if len(x) else np.zeros(0, dtype=np.int64) for x in buf[1:3])
+        pos = np.empty(len(kind), dtype=np.int64)
+        k = kind == _OBJ; pos[k] = a[k]
+        pos[kind == _CONST] = n
+        k = kind == _MATRIX; pos[k] = n + 1 + indptr[a[k]] + b[k]
+        k = kind == _RHS; pos[k] = n + 1 + nnz + a[k]
+        return pos, np.array(buf[3], dtype=float)
+
+    base = np.zeros(n + 1 + nnz + m)
+    np.add.at(base, *positions(fixed))
+    slot_pos, slot_sign = positions(slots)
+
+    # Column-major view for the MPS COLUMNS section
+    csc_order = np.argsort(indices, kind='stable')
+    row_of = np.repeat(np.arange(m, dtype=np.int64), np.diff(indptr))
+    col_ptr = np.zeros(n + 1, dtype=np.int64)
+    col_ptr[1:] = np.cumsum(np.bincount(indices, minlength=n))
+
+    cats = np.asarray(cats, dtype=np.int8)
+    rows_mps = "ROWS\n N  OBJ\n" + "".join(f" {s}  C{r:07d}\n" for r, s in enumerate(senses))
+    bounds_mps = "".join(
+        f" BV BND       X{j:07d}\n" if c == 2 else f" LO BND       X{j:07d}   0.000000000000e+00\n"
+        for j, c in enumerate(cats.tolist()) if c
+    )
+    return {
+        'names': np.asarray(names), 'cats': cats, 'indptr': indptr,
+        'col_ptr': col_ptr, 'csc_rows': row_of[csc_order], 'csc_order': csc_order,
+        'slot_pos': slot_pos, 'slot_sign': slot_sign,
+        'base': base, 'rows_mps': rows_mps, 'bounds_mps': bounds_mps
+    }
+
+
+# --- Disk cache (one directory per structure) ---
+def _store(key, entry):
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    tmp = tempfile.mkdtemp(dir=CACHE_DIR, prefix='.tmp-')
+    for name in _ARRAYS:
+        np.save(os.path.join(tmp, f"{name}.npy"), entry[name])
+    for name in ('rows_mps', 'bounds_mps'):
+        with open(os.path.join(tmp, f"{name}.txt"), 'w') as f:
+            f.write(entry[name])
+    try:
+        os.rename(tmp, os.path.join(CACHE_DIR, key))   # atomic: readers never see half an entry
+    except OSError:
+        shutil.rmtree(tmp, ignore_errors=True)         # another worker stored it first
+    _evict()
+
+
+def _evict():
+    try:
+        entries = [os.path.join(CACHE_DIR, d) for d in os.listdir(CACHE_DIR) if not d.startswith('.')]
+        if len(entries) <= MAX_ENTRIES: return
+        entries.sort(key=os.path.getmtime)
+    except OSError:
+        return
+    for path in entries[:len(entries) - MAX_ENTRIES]:
+        shutil.rmtree(path, ignore_errors=True)
+
+
+def _remember(key, entry):
+    with _memo_lock:
+        _memo[key] = entry
+        _memo.move_to_end(key)
+        while len(_memo) > MEMO_SIZE: _memo.popitem(last=False)
+
+
+def _load(key):
+    path = os.path.join(CACHE_DIR, key)
+    with _memo_lock:
+        entry = _memo.get(key)
+        if entry is not None: _memo.move_to_end(key)
+    if entry is None:
+        try:
+            entry = {name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode='r') for name in _ARRAYS}
+            for name in ('rows_mps', 'bounds_mps'):
+                with open(os.path.join(path, f"{name}.txt")) as f:
+                    entry[name] = f.read()
+        except (OSError, ValueError):
+            return None
+        _remember(key, entry)
+    try:
+        os.utime(path)   # LRU stamp shared by all workers
+    except OSError:
+        pass
+    return entry
+
+
+# --- Solve ---
+def _write_mps(path, entry, obj, data, rhs):
+    # Streamed in column chunks: no full copy of the file (or of the matrix as Python objects)
+    cats, col_ptr, csc_rows = entry['cats'], entry['col_ptr'], entry['csc_rows']
+    values = data[entry['csc_order']]
+
+    with open(path, 'w') as f:
+        f.write("NAME          MODEL\n" + entry['rows_mps'] + "COLUMNS\n")
+        for start in range(0, len(obj), MPS_CHUNK):
+            stop = min(len(obj), start + MPS_CHUNK)
+            ptr = col_ptr[start:stop + 1].tolist()
+            rows_k = csc_rows[ptr[0]:ptr[-1]].tolist()
+            vals_k = values[ptr[0]:ptr[-1]].tolist()
+            lines = []
+            for j, c, o in zip(range(start, stop), cats[start:stop].tolist(), obj[start:stop].tolist()):
+                col = f"X{j:07d}"
+                if c: lines.append(_MARK_START)
+                for k in range(ptr[j - start] - ptr[0], ptr[j - start + 1] - ptr[0]):
+                    if vals_k[k] != 0:
+                        lines.append(f"    {col}  C{rows_k[k]:07d}  {vals_k[k]: .12e}\n")
+                lines.append(f"    {col}  OBJ       {o: .12e}\n")
+                if c: lines.append(_MARK_END)
+            f.write("".join(lines))
+        f.write("RHS\n")
+        for r, b in enumerate(rhs.tolist()):
+            if b != 0: f.write(f"    RHS       C{r:07d}  {b: .12e}\n")
+        f.write("BOUNDS\n" + entry['bounds_mps'] + "ENDATA\n")
+
+
+def _run_cbc(solver, mps_path, sol_path, maximize):
+    # Same command line PuLP builds for CBC (see COIN_CMD.solve_CBC)
+    if not solver.executable(solver.path):
+        raise pulp.PulpSolverError(f"Pulp: cannot execute {solver.path}")
+    args = [solver.path, mps_path] + (['-max'] if maximize else [])
+    if solver.timeLimit is not None: args += ['-sec', str(solver.timeLimit)]
+    for option in solver.options + solver.getOptions():
+        args += ('-' + option).split()
+    args += ['-branch', '-printingOptions', 'all', '-solution', sol_path]
+    done = subprocess.run(args, stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    if done.returncode != 0 or not os.path.exists(sol_path):
+        raise pulp.PulpSolverError("Pulp: Error while executing " + solver.path)
+
+
+def _read_solution(sol_path, n, m):
+    x, activity, pi = np.zeros(n), np.zeros(m), np.zeros(m)
+    with open(sol_path) as f:
+        f.readline()
+        for line in f:
+            parts = line.split()
+            if len(parts) < 4: break
+            if parts[0] == '**': parts = parts[1:]   # infeasible rows are flagged
+            name = parts[1]
+            if name[0] == 'X':
+                x[int(name[1:])] = float(parts[2])
+            elif name[0] == 'C':
+                activity[int(name[1:])] = float(parts[2])
+                pi[int(name[1:])] = float(parts[3])
+    return x, activity, pi
+
+
+def solve(store_data, sense, objective_str, constraints_str, solver):
+    """
+    Solves a flat linear model from its cached structure.
+
+    The cache key is the model text with every number replaced by '#' plus
+    the variable declarations (scalars and blocks), so the same template
+    with new demands, costs or capacities hits the cache; only the literal
+    vector is re-read.
+    Returns a result dict like solver_engine.collect_results, or None when
+    the model is not flat linear (caller falls back to the PuLP path).
+    """
+    declared = [v for v in store_data.get('variables', []) if v.get('shape', 'scalar') in ('scalar', 'block')]
+    if not declared or not objective_str.strip(): return None
+    lines = [objective_str.strip()] + [line.strip() for line in constraints_str.split('\n') if line.strip()]
+    text = "\n".join(lines)
+
+    t0 = time.time()
+    template = _LITERAL.sub('#', text)
+    digest = hashlib.sha1(template.encode())
+    digest.update(json.dumps(declared).encode())
+    key = digest.hexdigest()
+    entry = _load(key)
+    hit = entry is not None
+    if not hit:
+        entry = _compile(template.split("\n"), dict(var_blocks.scalars(declared)))
+        if entry is None: return None
+        try:
+            _store(key, entry)
+        except OSError as e:
+            print(f"[Model Cache] not stored: {e}")
+        _remember(key, entry)
+
+    # 1. Patch the numbers into the cached structure
+    literals = np.fromiter((float(m.group()) for m in _LITERAL.finditer(text)), dtype=float)
+    if len(literals) != len(entry['slot_pos']): return None
+    values = np.array(entry['base'])
+    np.add.at(values, entry['slot_pos'], entry['slot_sign'] * literals)
+    n, m = len(entry['cats']), len(entry['indptr']) - 1
+    nnz = int(entry['indptr'][-1])
+    obj, obj_const = values[:n], values[n]
+    data, rhs = values[n + 1:n + 1 + nnz], values[n + 1 + nnz:]
+    t_build = time.time() - t0
+
+    # 2. Solve
+    mps_path, sol_path = solver.create_tmp_files("model", "mps", "sol")
+    try:
+        _write_mps(mps_path, entry, obj, data, rhs)
+        _run_cbc(solver, mps_path, sol_path, sense == 'maximize')
+        status_code, _ = solver.get_status(sol_path)
+        x, activity, pi = _read_solution(sol_path, n, m)
+    finally:
+        solver.delete_tmp_files(mps_path, sol_path)
+
+    nonzero = np.flatnonzero(np.abs(x) > 1e-9)
+    print(f"[Model Cache] {'hit' if hit else 'miss'} {key[:10]}: {n} vars, {m} rows, build {t_build:.3f}s, total {time.time() - t0:.2f}s")
+    return {
+        'status': pulp.LpStatus[status_code],
+        'objective': float(obj @ x + obj_const),
+        # Only nonzero values (absent variables are 0); names are read for those alone
+        'variables': [{'Variable': name, 'Value': v} for name, v in zip(entry['names'][nonzero].tolist(), x[nonzero].tolist())],
+        'constraints': [{'Constraint': f"C_{r}", 'Shadow Price': p, 'Slack': b - a}
+                        for r, (p, b, a) in enumerate(zip(pi.tolist(), rhs.tolist(), activity.tolist()))]
+    }
@@ -3,6 +3,9 @@ from dash import html, dash_table, dcc
 import pandas as pd
 import plotly.graph_objects as go
 from common.styles import *
+from common.inputs import safe_float
+import modules.cutting.logic as cut_logic
+import modules.cutting.remnants as remnants
 
 # --- 1. UI Rendering Function ---
 def render_input():
@@ -23,7 +26,31 @@ def render_input():
                     placeholder="0", 
                     style={'width': '80px', 'padding': '6px 10px', 'borderRadius': '4px', 'border': '1px solid #ccc', 'fontSize': '14px'}
                 )
-            ], style={'marginBottom': '25px', 'display': 'flex', 'alignItems': 'center'})
+            ], style={'marginBottom': '15px', 'display': 'flex', 'alignItems': 'center'}),
+
+            # Input: Setup (saw reconfiguration) per distinct pattern
+            html.Div([
+                html.Label("Setup Cost ($/pattern):", style={'fontWeight': 'bold', 'color': '#333', 'marginRight': '10px'}),
+                dcc.Input(
+                    id='input-setup-cost', type='number', value=0, min=0, step=1, placeholder="0",
+                    style={'width': '80px', 'padding': '6px 10px', 'borderRadius': '4px', 'border': '1px solid #ccc', 'fontSize': '14px', 'marginRight': '25px'}
+                ),
+                html.Label("Setup Time (min/pattern):", style={'fontWeight': 'bold', 'color': '#333', 'marginRight': '10px'}),
+                dcc.Input(
+                    id='input-setup-time', type='number', value=0, min=0, step=1, placeholder="0",
+                    style={'width': '80px', 'padding': '6px 10px', 'borderRadius': '4px', 'border': '1px solid #ccc', 'fontSize': '14px'}
+                )
+            ], style={'marginBottom': '15px', 'display': 'flex', 'alignItems': 'center'}),
+
+            # Input: Remnant Inventory
+            dcc.Checklist(
+                id='input-remnants',
+                options=[{'label': ' Reuse offcuts from remnant inventory (commit a plan to update it)', 'value': 'use'}],
+                value=[],
+                inputStyle={'marginRight': '8px'},
+                style={'marginBottom': '25px', 'fontSize': '14px', 'color': '#333'}
+            ),
+            dcc.Store(id='remnant-rev', data=0)
         ]),
         
         # Table 1: Stocks
@@ -69,17 +96,14 @@ def render_input():
     ])
 
 # --- 2. Data Parsing ---
-def safe_float(value, default=0.0):
-    try:
-        if value is None or str(value).strip() == '': return default
-        return float(value)
-    except: return default
-
 def get_params(data_inputs, sense):
     if not data_inputs: data_inputs = {}
     cut_data = data_inputs.get('cut_table', []) or []
     stock_data = data_inputs.get('cut_stock_table', []) or []
     kerf = safe_float(data_inputs.get('kerf_val', 0), 0.0)
+    use_remnants = 'use' in (data_inputs.get('remnants_val') or [])
+    setup_cost = max(safe_float(data_inputs.get('setup_cost', 0), 0.0), 0.0)
+    setup_time = max(safe_float(data_inputs.get('setup_time', 0), 0.0), 0.0)
     
     items = []
     item_lens = []
@@ -106,8 +130,15 @@ def get_params(data_inputs, sense):
                 'Limit': safe_float(r.get('Limit'), 999)
             })
     
+    # Remnants are appended AFTER the user stocks so stock indices stay stable
+    if use_remnants:
+        try:
+            stocks = stocks + remnants.remnant_stocks(stocks, item_lens)
+        except Exception as e:
+            print(f"[Remnants] Inventory unavailable: {e}")
+
     # Validation Logic is handled in global_callbacks or visually indicated
-    params = {'Items': items, 'ItemLens': item_lens, 'Demands': demands, 'Prices': prices, 'Stocks': stocks, 'Sense': sense, 'Kerf': kerf}
+    params = {'Items': items, 'ItemLens': item_lens, 'Demands': demands, 'Prices': prices, 'Stocks': stocks, 'Sense': sense, 'Kerf': kerf, 'SetupCost': setup_cost, 'SetupTime': setup_time}
     
     param_list = [
         {'name': 'ItemLens', 'shape': 'list', 'data': item_lens}, 
@@ -116,12 +147,24 @@ def get_params(data_inputs, sense):
         {'name': 'Demands', 'shape': 'dict', 'data': demands},
         {'name': 'Prices', 'shape': 'dict', 'data': prices},
         {'name': 'Sense', 'shape': 'scalar', 'data': sense},
-        {'name': 'Kerf', 'shape': 'scalar', 'data': kerf}
+        {'name': 'Kerf', 'shape': 'scalar', 'data': kerf},
+        {'name': 'UseRemnants', 'shape': 'scalar', 'data': use_remnants},
+        {'name': 'SetupCost', 'shape': 'scalar', 'data': setup_cost},
+        {'name': 'SetupTime', 'shape': 'scalar', 'data': setup_time}
     ]
     return params, param_list
 
 # --- 3. Result Analytics (Bug Fixed: Rounding) ---
 def process_results(res, store):
+    fig, table_rows, report_md, _ = _build_plan(res, store)
+    return fig, table_rows, report_md
+
+def inventory_changes(res, store):
+    """(remnant ids reused, new offcuts as (stock_name, length, cost)) of one plan."""
+    return _build_plan(res, store)[3]
+
+def _build_plan(res, store):
+    # Read-only: the remnant inventory only changes when a plan is committed
     params = {p['name']: p['data'] for p in store['parameters']}
     items_list = params.get('Items', [])
     prices = params.get('Prices', {}) 
@@ -130,6 +173,9 @@ def process_results(res, store):
     lens_list = params.get('ItemLens', [])
     demands = params.get('Demands', {})
     kerf = params.get('Kerf', 0.0)
+    use_remnants = params.get('UseRemnants', False)
+    setup_cost = params.get('SetupCost', 0.0)
+    setup_time = params.get('SetupTime', 0.0)
     
     produced_counts = {item: 0 for item in items_list}
     total_material_cost = 0  
@@ -138,6 +184,9 @@ def process_results(res, store):
     total_revenue = 0 
     
     raw_bins = {} 
+    used_remnants = []
+    patterns = set()
+    new_offcuts = []
     
     for v in res['variables']:
         if v['Value'] <= 1e-5: continue
@@ -166,9 +215,10 @@ def process_results(res, store):
                 raw_bins[key]['items'].append({'name': item_name, 'count': count, 'len': length})
             except: continue
 
-    sorted_keys = sorted(raw_bins.keys())
+    # Bars keep their "Stock #" across re-optimizations (see cut_logic.bar_numbers)
+    numbers = cut_logic.bar_numbers(res)
+    sorted_keys = sorted(raw_bins.keys(), key=lambda k: numbers.get(f"ST{k[0]}_B{k[1]}", 0))
     table_rows = []
-    global_counter = 1
     
     traces = {} # For Graph Objects
     def add_trace_data(name, y_cat, length, start_pos, color_group='Product'):
@@ -182,7 +232,7 @@ def process_results(res, store):
         b_data = raw_bins[key]
         s_idx = b_data['stock_idx']
         stock_def = stock_map[s_idx]
-        y_label = f"Stock #{global_counter}"
+        y_label = f"Stock #{numbers.get(f'ST{key[0]}_B{key[1]}')}"
         
         flat_items = []
         for item_grp in b_data['items']:
@@ -192,6 +242,7 @@ def process_results(res, store):
         if not flat_items: continue
         
         total_material_cost += stock_def['Cost']
+        if 'RemnantId' in stock_def: used_remnants.append(stock_def['RemnantId'])
         current_pos = 0
         kerf_len_in_this_bar = 0
         
@@ -214,17 +265,27 @@ def process_results(res, store):
              add_trace_data('Waste', y_label, waste_len, current_pos, 'Waste')
              scrap_ratio = waste_len / stock_def['Length']
              total_scrap_value += stock_def['Cost'] * scrap_ratio
+             
+             # Keep usable offcuts under the ORIGINAL stock type; cutting the
+             # offcut off the last piece takes one more blade width
+             offcut_len = waste_len - kerf
+             if use_remnants and offcut_len >= remnants.MIN_REMNANT_LEN:
+                 parent = stock_def.get('Parent', stock_def['Name'])
+                 parent_def = next((s for s in stock_info_list if s['Name'] == parent), stock_def)
+                 offcut_value = parent_def['Cost'] * (offcut_len / parent_def['Length'])
+                 new_offcuts.append((parent, offcut_len, offcut_value))
 
         if kerf_len_in_this_bar > 0:
             kerf_ratio = kerf_len_in_this_bar / stock_def['Length']
             total_kerf_value += stock_def['Cost'] * kerf_ratio
 
+        # A pattern = stock type + exact item counts on the bar (remnants count as their parent stock)
+        patterns.add((stock_def.get('Parent', stock_def['Name']), tuple(sorted((i['name'], i['count']) for i in b_data['items']))))
+
         cut_str = ", ".join([f"{i['name']} ({i['count']})" for i in b_data['items']])
         usage_pct = (current_pos / stock_def['Length']) * 100
         table_rows.append({'Stock': y_label, 'Plan': f"{stock_def['Name']}: {cut_str}", 'Usage': f"{usage_pct:.1f}%"})
         
-        global_counter += 1
-        
     fig = go.Figure()
     fixed_colors = {'Waste': '#e0e0e0', 'Blade': '#222222'}
     
@@ -255,7 +316,23 @@ def process_results(res, store):
         report_md += f"* **Total Waste:** `${total_waste_value:,.2f}` (Scrap: `${total_scrap_value:,.2f}` + Blade Loss: `${total_kerf_value:,.2f}`)\n"
     else:
         report_md += f"* **Waste:** `${total_waste_value:,.2f}`\n"
-    report_md += f"* **Stocks Used:** `{len(table_rows)}`\n\n"
+    report_md += f"* **Stocks Used:** `{len(table_rows)}`\n"
+    report_md += f"* **Distinct Patterns:** `{len(patterns)}`"
+    if setup_time > 0:
+        report_md += f" (Setup Time: `{len(patterns) * setup_time:,.0f} min`)"
+    if setup_cost > 0:
+        report_md += f" (Setup Cost: `${len(patterns) * setup_cost:,.2f}`)"
+    report_md += "\n\n"
+
+    if use_remnants:
+        report_md += "### Remnant Inventory (on commit)\n"
+        report_md += f"* **Remnants Reused:** `{len(used_remnants)}`\n"
+        report_md += f"* **New Offcuts To Store:** `{len(new_offcuts)}` (>= {remnants.MIN_REMNANT_LEN:,.0f} mm)\n"
+        try:
+            report_md += f"* **Remnants In Stock:** `{remnants.get_store().count()}`\n"
+        except Exception as e:
+            print(f"[Remnants] Inventory unavailable: {e}")
+        report_md += "\n"
 
     report_md += "### Production Status\n"
     for item in items_list:
@@ -268,4 +345,4 @@ def process_results(res, store):
             
         report_md += f"* **{item}:** {actual} / {target}{status_str}\n"
 
-    return fig, table_rows, report_md
+    return fig, table_rows, report_md, (used_remnants, new_offcuts)
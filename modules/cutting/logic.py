@@ -1,7 +1,12 @@
 # modules/cutting/logic.py
 import pulp
+import solver_engine
+import var_blocks
 
-def bridge_cutting(params):
+# Every changed piece assignment costs this much in a re-optimization
+CHANGE_PENALTY = 0.01
+
+def bridge_cutting(params, symmetry_from=None):
     """
     Strict Cutting Stock Logic:
     Accounts for Kerf (Blade Width) occurring ONLY between items (N-1 cuts).
@@ -9,7 +14,12 @@ def bridge_cutting(params):
     Mathematical Trick:
     Sum( ItemLen + Kerf ) <= StockLen + Kerf
     This mathematically ensures exactly (N-1) kerfs are counted within the limit.
+
+    `symmetry_from` ({stock index: bin index}) starts the bin-order rows of a
+    stock at that bin. A re-optimization keeps the cut bars in their bins, so
+    the open bins before the last cut one must be free to stay empty.
     """
+    symmetry_from = symmetry_from or {}
     items = params.get('Items', [])
     item_lens = params.get('ItemLens', [])
     demands = params.get('Demands', {})
@@ -38,12 +48,14 @@ def bridge_cutting(params):
         # Logic: (Item1+K) + (Item2+K) <= Stock + K  -->  Item1 + K + Item2 <= Stock
         adjusted_stock_len = stock_len + kerf
 
+        # Variables are declared per stock as blocks (names are generated lazily):
+        # U_ST{s}_B{b} = is this bin used, A_IT{i}_ST{s}_B{b} = pieces of item i in it
+        variables.append(var_blocks.block(f"U_ST{s_idx}", 'Binary', f"U_ST{s_idx}_B{{0}}", [stock_limit]))
+        variables.append(var_blocks.block(f"A_ST{s_idx}", 'Integer', f"A_IT{{0}}_ST{s_idx}_B{{1}}", [len(items), stock_limit]))
+
         for b_idx in range(stock_limit):
             bin_id = f"ST{s_idx}_B{b_idx}"
-            
-            # Binary Variable: Is this bin used?
             u_var = f"U_{bin_id}"
-            variables.append({'name': u_var, 'type': 'Binary'})
             
             # Objective
             if sense == 'minimize':
@@ -55,7 +67,6 @@ def bridge_cutting(params):
             assign_vars = []
             for i_idx, item in enumerate(items):
                 a_var = f"A_IT{i_idx}_{bin_id}"
-                variables.append({'name': a_var, 'type': 'Integer'})
                 
                 if sense == 'maximize':
                     price = prices.get(item, 0)
@@ -71,10 +82,14 @@ def bridge_cutting(params):
             # Crucial Fix: Use adjusted_stock_len
             constraints.append(f"{lhs} <= {adjusted_stock_len} * {u_var}")
 
+            # Symmetry breaking: bins of one stock type are used in order
+            if b_idx > symmetry_from.get(s_idx, 0):
+                constraints.append(f"{u_var} <= U_ST{s_idx}_B{b_idx - 1}")
+
     # 3. Demand Constraints
     for i_idx, item in enumerate(items):
         target = demands.get(item, 0)
-        my_a_vars = [v['name'] for v in variables if f"A_IT{i_idx}_" in v['name']]
+        my_a_vars = [f"A_IT{i_idx}_ST{s_idx}_B{b_idx}" for s_idx, stock in enumerate(stocks) for b_idx in range(int(stock['Limit']))]
         
         if not my_a_vars: continue
         lhs = " + ".join(my_a_vars)
@@ -88,3 +103,100 @@ def bridge_cutting(params):
     constraints_str = "\n".join(constraints)
     
     return objective_str, constraints_str, variables
+
+def _bin_index(name):
+    # A_IT{i}_ST{s}_B{b}, U_ST{s}_B{b} or ST{s}_B{b} -> (s, b)
+    s, b = name.split('_')[-2:]
+    return int(s.replace('ST', '')), int(b.replace('B', ''))
+
+def bar_numbers(res):
+    """
+    The "Stock #" of every used bar of a cutting result, keyed by bin id "ST{s}_B{b}".
+
+    Numbers saved in `res['bar_numbers']` (a re-optimized plan) are kept, so a
+    bar the operators already know never changes its number; the other used
+    bars are numbered after them in (stock index, bin index) order.
+    """
+    used_bins = set()
+    for v in res.get('variables', []):
+        if v['Variable'].startswith('A_IT') and int(round(v['Value'] or 0)) > 0:
+            used_bins.add(_bin_index(v['Variable']))
+
+    saved = res.get('bar_numbers') or {}
+    numbers = {f"ST{s}_B{b}": saved[f"ST{s}_B{b}"] for s, b in used_bins if f"ST{s}_B{b}" in saved}
+    next_n = max(saved.values(), default=0) + 1
+    for s, b in sorted(used_bins):
+        if f"ST{s}_B{b}" in numbers: continue
+        numbers[f"ST{s}_B{b}"] = next_n
+        next_n += 1
+    return numbers
+
+def parse_bars(text):
+    """Stock numbers typed by the operators, e.g. "1-3, 5" -> [1, 2, 3, 5]."""
+    bars = set()
+    for part in str(text or '').replace(';', ',').split(','):
+        part = part.strip()
+        if not part: continue
+        lo, _, hi = part.partition('-')
+        try:
+            lo, hi = int(lo), int(hi or lo)
+        except ValueError:
+            raise ValueError(f"'{part}' is not a stock number or range")
+        if lo < 1 or hi < lo: raise ValueError(f"'{part}' is not a valid range")
+        bars.update(range(lo, hi + 1))
+    return sorted(bars)
+
+def frozen_bar_vars(prev_res, bars_done, variables):
+    """
+    Variable names to freeze for a re-optimization (see solver_engine.reoptimize_model).
+    
+    `bars_done` are the "Stock #" numbers from the plan table that the
+    operators have already cut (numbered by bar_numbers, like the table).
+    `variables` is the model's variable list (blocks): results only hold
+    nonzero values, but the empty slots of a cut bar must stay empty too.
+    """
+    bars_done = set(bars_done)
+    done_ids = {bin_id for bin_id, n in bar_numbers(prev_res).items() if n in bars_done}
+    return [name for name, _ in var_blocks.scalars(variables) if "_".join(name.split('_')[-2:]) in done_ids]
+
+def reoptimize_plan(prev_plan, prev_params, store, bars_done, time_limit=15):
+    """
+    Re-plans after a change to the orders (e.g. a rush order) once `bars_done`
+    of `prev_plan` are already cut. Those bars are fixed exactly as cut, the
+    rest is re-solved with a penalty on every changed assignment, and bars
+    keep their "Stock #" (new bars are numbered after the old ones).
+
+    `prev_params` are the parameters the plan was solved with and `store` the
+    current model data; bins are only comparable if the stock list is
+    unchanged and the old items are still listed first, in the same order.
+    Setup costs are not modelled here (the assignment model has no patterns).
+    """
+    params = {p['name']: p['data'] for p in store['parameters']}
+    prev_items = list(zip(prev_params.get('Items', []), prev_params.get('ItemLens', [])))
+    items = list(zip(params.get('Items', []), params.get('ItemLens', [])))
+    stock_key = lambda stocks: [(s['Name'], s['Length'], int(s['Limit'])) for s in stocks]
+    if stock_key(prev_params.get('Stocks', [])) != stock_key(params.get('Stocks', [])):
+        return {'status': 'Error', 'error_msg': "The stock list changed since this plan was solved. Re-optimizing needs the same stocks; run the solver again instead."}
+    if items[:len(prev_items)] != prev_items:
+        return {'status': 'Error', 'error_msg': "Items were renamed, removed or reordered since this plan was solved. Only demands may change and new items be added at the end; run the solver again instead."}
+    if abs(params.get('Kerf', 0) - prev_params.get('Kerf', 0)) > 1e-9:
+        return {'status': 'Error', 'error_msg': "The blade width changed since this plan was solved; run the solver again instead."}
+
+    numbers = bar_numbers(prev_plan)
+    unknown = sorted(set(bars_done) - set(numbers.values()))
+    if unknown:
+        return {'status': 'Error', 'error_msg': f"Stock #{', #'.join(map(str, unknown))} is not part of this plan."}
+
+    done_bins = [bin_id for bin_id, n in numbers.items() if n in set(bars_done)]
+    symmetry_from = {}
+    for s_idx, b_idx in map(_bin_index, done_bins):
+        symmetry_from[s_idx] = max(symmetry_from.get(s_idx, 0), b_idx + 1)
+    objective_str, constraints_str, variables = bridge_cutting(params, symmetry_from=symmetry_from)
+    model_data = dict(store, variables=variables)
+    frozen = frozen_bar_vars(prev_plan, bars_done, variables)
+    res = solver_engine.reoptimize_model(prev_plan, model_data, params.get('Sense', 'minimize'), objective_str, constraints_str,
+                                         frozen_vars=frozen, change_penalty=CHANGE_PENALTY, time_limit=time_limit)
+    if res.get('status') not in ('Infeasible', 'Error'):
+        # Old bars keep their numbers; bars that are no longer used drop out
+        res['bar_numbers'] = bar_numbers(dict(res, bar_numbers=numbers))
+    return res
@@ -0,0 +1,250 @@
+# modules/cutting/patterns.py
+import math
+import time
+import numpy as np
+import pulp
+import solver_engine
+import modules.cutting.logic as cut_logic
+
+MAX_CG_ROUNDS = 100        # column generation rounds
+ARTIFICIAL_COST = 1e6      # keeps the restricted master LP feasible
+MASTER_TIME_LIMIT = 60
+
+def _grid_scale(values):
+    # Knapsack runs on an integer grid: 1 mm, or 0.1 mm if any length needs it
+    return 1 if all(float(v).is_integer() for v in values) else 10
+
+def _best_pattern(weights, values, bounds, capacity):
+    """
+    Bounded integer knapsack (NumPy DP over the length grid).
+    Returns (value, counts). Bounded items are split into 1, 2, 4, ... pieces.
+    """
+    pieces = []
+    for i, (w, v, b) in enumerate(zip(weights, values, bounds)):
+        if v <= 1e-9 or b <= 0 or w > capacity: continue
+        k = 1
+        while b > 0:
+            take = min(k, b)
+            pieces.append((i, take, w * take, v * take))
+            b -= take
+            k *= 2
+
+    dp = np.zeros(capacity + 1)
+    took = np.zeros((len(pieces), capacity + 1), dtype=bool)
+    for p_idx, (_, _, w, v) in enumerate(pieces):
+        cand = dp[:-w] + v if w > 0 else dp + v
+        better = cand > dp[w:] + 1e-12
+        took[p_idx, w:] = better
+        dp[w:] = np.where(better, cand, dp[w:])
+
+    counts = [0] * len(weights)
+    cap = int(np.argmax(dp))
+    for p_idx in range(len(pieces) - 1, -1, -1):
+        if took[p_idx, cap]:
+            i, take, w, _ = pieces[p_idx]
+            counts[i] += take
+            cap -= w
+    return float(dp.max()), counts
+
+def _pattern_cap(counts, demands, limit, sense):
+    # Bars of one pattern that can ever be useful (tight big-M for the setup link)
+    used = [(a, d) for a, d in zip(counts, demands) if a > 0]
+    if sense == 'minimize':
+        need = max(math.ceil(d / a) for a, d in used)
+    else:
+        need = min(math.floor(d / a) for a, d in used)
+    return max(0, min(limit, need))
+
+def generate_patterns(params):
+    """
+    Column generation on the LP relaxation of the pattern model:
+    each column is one feasible way to cut one stock type (kerf included:
+    sum(n_i * (len_i + kerf)) <= stock + kerf). New columns come from a
+    knapsack priced with the master's duals until none improves.
+    Returns a list of (stock_idx, counts).
+    """
+    lens = params.get('ItemLens', [])
+    items = params.get('Items', [])
+    demands = [float(params.get('Demands', {}).get(i, 0)) for i in items]
+    prices = [float(params.get('Prices', {}).get(i, 0)) for i in items]
+    stocks = params.get('Stocks', [])
+    kerf = float(params.get('Kerf', 0.0))
+    sense = params.get('Sense', 'minimize')
+
+    scale = _grid_scale(lens + [kerf] + [s['Length'] for s in stocks])
+    weights = [int(math.ceil((l + kerf) * scale - 1e-9)) for l in lens]
+    caps = [int(math.floor((s['Length'] + kerf) * scale + 1e-9)) for s in stocks]
+    bounds = [int(math.ceil(d)) for d in demands]
+
+    # 1. Seed: one homogeneous pattern per (stock, item)
+    patterns = []
+    for s_idx, cap in enumerate(caps):
+        for i, w in enumerate(weights):
+            n = min(cap // w, bounds[i]) if w > 0 else 0
+            if n > 0:
+                counts = [0] * len(items)
+                counts[i] = n
+                patterns.append((s_idx, counts))
+
+    # 2. Price new columns with the LP duals (master kept in min-form)
+    for _ in range(MAX_CG_ROUNDS):
+        lp = pulp.LpProblem("CG_Master", pulp.LpMinimize)
+        x = [pulp.LpVariable(f"x{p}", lowBound=0) for p in range(len(patterns))]
+        art = [pulp.LpVariable(f"art{i}", lowBound=0) for i in range(len(items))] if sense == 'minimize' else []
+        cost = []
+        for (s_idx, counts), var in zip(patterns, x):
+            c = stocks[s_idx]['Cost'] - (sum(a * pr for a, pr in zip(counts, prices)) if sense == 'maximize' else 0)
+            cost.append((var, c))
+        lp += pulp.LpAffineExpression(cost + [(a, ARTIFICIAL_COST) for a in art])
+        for i in range(len(items)):
+            row = pulp.LpAffineExpression([(var, counts[i]) for (_, counts), var in zip(patterns, x) if counts[i]] + ([(art[i], 1)] if art else []))
+            if sense == 'minimize':
+                lp += pulp.LpConstraint(row, pulp.LpConstraintGE, f"D{i}", demands[i])
+            else:
+                lp += pulp.LpConstraint(row, pulp.LpConstraintLE, f"D{i}", demands[i])
+        for s_idx, s in enumerate(stocks):
+            row = pulp.LpAffineExpression([(var, 1) for (p_s, _), var in zip(patterns, x) if p_s == s_idx])
+            lp += pulp.LpConstraint(row, pulp.LpConstraintLE, f"S{s_idx}", int(s['Limit']))
+        lp.solve(solver_engine.make_solver(time_limit=MASTER_TIME_LIMIT))
+        if pulp.LpStatus[lp.status] != 'Optimal': break
+
+        pi = [lp.constraints[f"D{i}"].pi or 0 for i in range(len(items))]
+        added = 0
+        known = {(s, tuple(c)) for s, c in patterns}
+        for s_idx, s in enumerate(stocks):
+            sigma = lp.constraints[f"S{s_idx}"].pi or 0
+            values = [p + (pr if sense == 'maximize' else 0) for p, pr in zip(pi, prices)]
+            best, counts = _best_pattern(weights, values, bounds, caps[s_idx])
+            if s['Cost'] - sigma - best < -1e-6 and (s_idx, tuple(counts)) not in known:
+                patterns.append((s_idx, counts))
+                known.add((s_idx, tuple(counts)))
+                added += 1
+        if not added: break
+
+    return patterns
+
+def expand_plan(patterns, bars_per_pattern):
+    """
+    Pattern counts -> per-bar assignment values named like the assignment
+    model (A_IT{i}_ST{s}_B{b}, U_ST{s}_B{b}), so process_results and the
+    re-optimization helpers work unchanged.
+    """
+    next_bin = {}
+    res_vars = []
+    for (s_idx, counts), n_bars in zip(patterns, bars_per_pattern):
+        for _ in range(int(round(n_bars))):
+            b_idx = next_bin.get(s_idx, 0)
+            next_bin[s_idx] = b_idx + 1
+            bin_id = f"ST{s_idx}_B{b_idx}"
+            res_vars.append({'Variable': f"U_{bin_id}", 'Value': 1})
+            res_vars += [{'Variable': f"A_IT{i}_{bin_id}", 'Value': a} for i, a in enumerate(counts) if a > 0]
+    return res_vars
+
+def plan_patterns(variables, n_items):
+    """Distinct (stock_idx, counts) patterns of a per-bar plan (inverse of expand_plan)."""
+    bars = {}
+    for v in variables:
+        if not v['Variable'].startswith('A_IT'): continue
+        count = int(round(v['Value'] or 0))
+        if count <= 0: continue
+        parts = v['Variable'].split('_')
+        i_idx, s_idx, b_idx = int(parts[1][2:]), int(parts[2][2:]), int(parts[3][1:])
+        if i_idx < n_items: bars.setdefault((s_idx, b_idx), [0] * n_items)[i_idx] = count
+    return sorted({(s_idx, tuple(counts)) for (s_idx, _), counts in bars.items()})
+
+def _exact_patterns(params):
+    # Patterns of the exact assignment-model optimum; seeding the master with
+    # them keeps its best plan at least as good as the plain solve
+    obj, const, variables = cut_logic.bridge_cutting(params)
+    res = solver_engine.solve_model({'variables': variables, 'parameters': []}, params.get('Sense', 'minimize'), obj, const)
+    if res.get('status') != 'Optimal': return []
+    return [(s_idx, list(counts)) for s_idx, counts in plan_patterns(res['variables'], len(params.get('Items', [])))]
+
+def solve_patterns(params, pool_size=1, pool_gap=0.05):
+    """
+    Setup-aware cutting: x_p bars of pattern p, y_p = 1 if pattern p is set up.
+    Objective = material (or -profit) + SetupCost * sum(y_p), solved as a MIP
+    over the generated columns (price-and-branch).
+    Solver runs: column generation LPs, the exact assignment model (seed
+    columns), the integer master, and one more master solve per extra plan.
+    """
+    print("----- [Pattern Engine] Start -----")
+    t0 = time.time()
+    items = params.get('Items', [])
+    stocks = params.get('Stocks', [])
+    demands = [float(params.get('Demands', {}).get(i, 0)) for i in items]
+    prices = [float(params.get('Prices', {}).get(i, 0)) for i in items]
+    sense = params.get('Sense', 'minimize')
+    setup_cost = float(params.get('SetupCost', 0))
+
+    if not items or not stocks:
+        return {'status': 'Error', 'error_msg': "Pattern Error: add at least one item and one stock."}
+
+    try:
+        # Column generation plus the exact optimum's patterns, for every pool
+        # size: a single solve must never be worse than the pool's first plan
+        patterns = generate_patterns(params)
+        known = {(s, tuple(c)) for s, c in patterns}
+        patterns += [(s, c) for s, c in _exact_patterns(params) if (s, tuple(c)) not in known]
+        if not patterns: return solver_engine.diagnose_infeasible(params)
+
+        # 1. Integer master over the generated patterns
+        lp_sense = pulp.LpMinimize if sense == 'minimize' else pulp.LpMaximize
+        prob = pulp.LpProblem("Pattern_Master", lp_sense)
+        x, y, obj = [], [], []
+        for p, (s_idx, counts) in enumerate(patterns):
+            cap = _pattern_cap(counts, demands, int(stocks[s_idx]['Limit']), sense)
+            xv = pulp.LpVariable(f"X_{p}", lowBound=0, upBound=cap, cat=pulp.LpInteger)
+            yv = pulp.LpVariable(f"Y_{p}", cat=pulp.LpBinary)
+            prob += pulp.LpConstraint(pulp.LpAffineExpression([(xv, 1), (yv, -cap)]), pulp.LpConstraintLE, f"Setup_{p}", 0)
+            # ...and y_p = 1 only if the pattern is cut, so the no-good cuts of the
+            # solution pool always change the set of patterns in the plan
+            prob += pulp.LpConstraint(pulp.LpAffineExpression([(xv, 1), (yv, -1)]), pulp.LpConstraintGE, f"Used_{p}", 0)
+            x.append(xv)
+            y.append(yv)
+            if sense == 'minimize':
+                obj += [(xv, stocks[s_idx]['Cost']), (yv, setup_cost)]
+            else:
+                obj += [(xv, sum(a * pr for a, pr in zip(counts, prices)) - stocks[s_idx]['Cost']), (yv, -setup_cost)]
+        prob += pulp.LpAffineExpression(obj)
+
+        for i in range(len(items)):
+            row = pulp.LpAffineExpression([(xv, counts[i]) for (_, counts), xv in zip(patterns, x) if counts[i]])
+            if sense == 'minimize':
+                prob += pulp.LpConstraint(row, pulp.LpConstraintGE, f"Demand_{i}", demands[i])
+            else:
+                prob += pulp.LpConstraint(row, pulp.LpConstraintLE, f"Demand_{i}", demands[i])
+        for s_idx, s in enumerate(stocks):
+            row = pulp.LpAffineExpression([(xv, 1) for (p_s, _), xv in zip(patterns, x) if p_s == s_idx])
+            prob += pulp.LpConstraint(row, pulp.LpConstraintLE, f"Stock_{s_idx}", int(s['Limit']))
+
+        prob.solve(solver_engine.make_solver(time_limit=MASTER_TIME_LIMIT))
+        status = pulp.LpStatus[prob.status]
+        if status == 'Infeasible':
+            return solver_engine.diagnose_infeasible(params)
+
+        # 2. Expand into per-bar values for the standard result views
+        counts_now = lambda: [xv.varValue or 0 for xv in x]
+        result = {
+            'status': status,
+            'objective': pulp.value(prob.objective),
+            'variables': expand_plan(patterns, counts_now()),
+            'constraints': [],
+            'setups': sum(1 for n in counts_now() if n > 0.5)
+        }
+
+        # 3. Alternative plans: no-good cuts on the setup binaries
+        if pool_size > 1 and status == 'Optimal':
+            result['pool'] = [{'objective': result['objective'], 'variables': result['variables']}]
+            for plan in solver_engine.solution_pool(prob, result['objective'], pool_size, pool_gap):
+                values = {v['Variable']: v['Value'] for v in plan['variables']}
+                bars = [values.get(xv.name, 0) for xv in x]
+                result['pool'].append({'objective': plan['objective'], 'variables': expand_plan(patterns, bars)})
+
+        print(f"[Pattern Engine] {len(patterns)} patterns generated, {result['setups']} used, {time.time() - t0:.2f}s")
+        return result
+
+    except Exception as e:
+        import traceback
+        traceback.print_exc()
+        return {'status': 'Error', 'error_msg': f"System Error:\n{str(e)}"}
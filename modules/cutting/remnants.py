@@ -0,0 +1,139 @@
+# modules/cutting/remnants.py
+import os
+import sqlite3
+import threading
+from contextlib import closing
+
+# Offcuts shorter than this are treated as scrap and never stored
+MIN_REMNANT_LEN = 300.0
+# Remnants offered to the solver per stock type (keeps the model small)
+MAX_CANDIDATES = 20
+# Remnants are offered at a fraction of their pro-rata stock value
+REMNANT_COST_RATIO = 0.1
+
+DB_PATH = os.environ.get('OPTIMYSTIC_REMNANT_DB', os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'remnants.db'))
+
+_lock = threading.Lock()
+
+
+class StalePlan(Exception):
+    pass
+
+
+class RemnantStore:
+    """
+    Persistent offcut inventory (SQLite).
+
+    Remnants are kept per stock type with a (stock_name, length) B-tree index,
+    so range queries like "remnants of Long_Bar >= 700mm" cost O(log n)
+    instead of a full scan, no matter how many tiny offcuts pile up.
+    """
+    def __init__(self, path=DB_PATH):
+        self.path = path
+        with _lock, closing(self._connect()) as conn, conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS remnants ("
+                " id INTEGER PRIMARY KEY AUTOINCREMENT,"
+                " stock_name TEXT NOT NULL,"
+                " length REAL NOT NULL,"
+                " cost REAL NOT NULL DEFAULT 0)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_remnant_len ON remnants (stock_name, length)")
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=10)
+
+    def add(self, offcuts):
+        # offcuts: iterable of (stock_name, length, cost)
+        rows = [(str(n), float(l), float(c)) for n, l, c in offcuts]
+        if not rows: return 0
+        with _lock, closing(self._connect()) as conn, conn:
+            conn.executemany("INSERT INTO remnants (stock_name, length, cost) VALUES (?, ?, ?)", rows)
+        return len(rows)
+
+    def consume(self, remnant_ids):
+        ids = [(int(i),) for i in remnant_ids]
+        if not ids: return 0
+        with _lock, closing(self._connect()) as conn, conn:
+            conn.executemany("DELETE FROM remnants WHERE id = ?", ids)
+        return len(ids)
+
+    def commit_plan(self, remnant_ids, offcuts):
+        """
+        Applies one executed plan in a single transaction: the reused remnants
+        are removed and its offcuts stored. Raises StalePlan (and changes
+        nothing) if any reused remnant is no longer in stock.
+        """
+        ids = sorted({int(i) for i in remnant_ids})
+        rows = [(str(n), float(l), float(c)) for n, l, c in offcuts]
+        with _lock, closing(self._connect()) as conn, conn:
+            if ids:
+                marks = ",".join("?" * len(ids))
+                found = conn.execute(f"SELECT COUNT(*) FROM remnants WHERE id IN ({marks})", ids).fetchone()[0]
+                if found != len(ids):
+                    raise StalePlan(f"{len(ids) - found} of the reused remnants are no longer in stock")
+                conn.execute(f"DELETE FROM remnants WHERE id IN ({marks})", ids)
+            conn.executemany("INSERT INTO remnants (stock_name, length, cost) VALUES (?, ?, ?)", rows)
+        return len(ids), len(rows)
+
+    def find(self, stock_name, min_len, max_len=None, limit=MAX_CANDIDATES, shortest=False):
+        # Longest fitting remnants first (or shortest: the tightest fits); served straight from the index
+        sql = "SELECT id, stock_name, length, cost FROM remnants WHERE stock_name = ? AND length >= ?"
+        args = [stock_name, float(min_len)]
+        if max_len is not None:
+            sql += " AND length <= ?"
+            args.append(float(max_len))
+        sql += f" ORDER BY length {'ASC' if shortest else 'DESC'} LIMIT ?"
+        args.append(int(limit))
+        with closing(self._connect()) as conn:
+            rows = conn.execute(sql, args).fetchall()
+        return [{'id': r[0], 'stock_name': r[1], 'length': r[2], 'cost': r[3]} for r in rows]
+
+    def count(self, stock_name=None):
+        with closing(self._connect()) as conn:
+            if stock_name is None:
+                return conn.execute("SELECT COUNT(*) FROM remnants").fetchone()[0]
+            return conn.execute("SELECT COUNT(*) FROM remnants WHERE stock_name = ?", (stock_name,)).fetchone()[0]
+
+
+_store = None
+
+def get_store():
+    global _store
+    if _store is None:
+        _store = RemnantStore()
+    return _store
+
+
+def remnant_stocks(stocks, item_lens, store=None):
+    """
+    Turns stored offcuts into extra stock rows (Limit 1, low cost) for the solver.
+
+    At most MAX_CANDIDATES per stock type, ranked by fit: the tightest fits
+    for every distinct item length first (so short remnants are offered for
+    short pieces), then the longest remnants that hold the shortest item.
+    """
+    if not stocks or not item_lens: return []
+    store = store or get_store()
+    lens = sorted(set(item_lens))
+    per_len = max(1, MAX_CANDIDATES // len(lens))
+
+    extra = []
+    for stock in stocks:
+        found = {}
+        for l in lens:
+            for r in store.find(stock['Name'], max(MIN_REMNANT_LEN, l), limit=per_len, shortest=True):
+                found.setdefault(r['id'], r)
+        for r in store.find(stock['Name'], max(MIN_REMNANT_LEN, lens[0])):
+            if len(found) >= MAX_CANDIDATES: break
+            found.setdefault(r['id'], r)
+        for r in list(found.values())[:MAX_CANDIDATES]:
+            extra.append({
+                'Name': f"Remnant_{r['id']}",
+                'Length': r['length'],
+                'Cost': round(r['cost'] * REMNANT_COST_RATIO, 4),
+                'Limit': 1,
+                'RemnantId': r['id'],
+                'Parent': stock['Name']
+            })
+    return extra
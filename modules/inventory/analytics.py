@@ -0,0 +1,106 @@
+# modules/inventory/analytics.py
+from dash import html, dash_table, dcc
+import plotly.graph_objects as go
+from common.styles import *
+from common.inputs import number_input, safe_float
+
+TOP_N_CHART = 20
+
+# --- 1. UI Rendering Function ---
+def render_input():
+    return html.Div([
+        html.H4("📦 Inventory", style={'color': '#4a4e69', 'fontWeight': '800', 'marginBottom': '5px'}),
+        html.P("Reorder point and order quantity per item. Leave capacity/budget at 0 for no shared limit.", style={'color': '#888', 'fontSize': '13px', 'marginBottom': '20px'}),
+
+        html.Div([
+            number_input("Service Level (%):", 'inv-service', 95, 0.5, width='90px'),
+            number_input("Warehouse Capacity:", 'inv-capacity', 0, width='90px'),
+            number_input("Stock Budget ($):", 'inv-budget', 0, width='90px'),
+        ], style={'display': 'flex', 'flexWrap': 'wrap', 'marginBottom': '15px'}),
+
+        dash_table.DataTable(
+            id='inv-table',
+            columns=[
+                {'name': 'Item', 'id': 'Item'},
+                {'name': 'Demand (units/yr)', 'id': 'Demand', 'type': 'numeric'},
+                {'name': 'Unit Cost ($)', 'id': 'Cost', 'type': 'numeric'},
+                {'name': 'Order Cost ($)', 'id': 'OrderCost', 'type': 'numeric'},
+                {'name': 'Holding (%/yr)', 'id': 'Holding', 'type': 'numeric'},
+                {'name': 'Lead Time (days)', 'id': 'LeadTime', 'type': 'numeric'},
+                {'name': 'Daily Std Dev', 'id': 'StdDev', 'type': 'numeric'},
+                {'name': 'Space / Unit', 'id': 'Space', 'type': 'numeric'}
+            ],
+            data=[
+                {'Item': 'Bolt_M8', 'Demand': 12000, 'Cost': 0.5, 'OrderCost': 40, 'Holding': 25, 'LeadTime': 7, 'StdDev': 10, 'Space': 0.01},
+                {'Item': 'Bearing_6204', 'Demand': 1500, 'Cost': 6, 'OrderCost': 60, 'Holding': 25, 'LeadTime': 14, 'StdDev': 3, 'Space': 0.05}
+            ],
+            editable=True, row_deletable=True, page_size=15,
+            style_table=TABLE_CONTAINER_STYLE, css=FIXED_CSS, style_header=TABLE_HEADER_STYLE, style_cell=TABLE_CELL_STYLE
+        ),
+        html.Button("＋ Item", id='btn-add-inv', n_clicks=0, style=ADD_BTN_STYLE)
+    ])
+
+# --- 2. Data Parsing ---
+def get_params(data_inputs):
+    if not data_inputs: data_inputs = {}
+    inv_data = data_inputs.get('inv_table', []) or []
+
+    # Column-wise lists: the engine turns each one into a NumPy array
+    cols = {'Items': [], 'Demand': [], 'Cost': [], 'OrderCost': [], 'HoldingRate': [], 'LeadTime': [], 'StdDev': [], 'Space': []}
+    for r in inv_data:
+        name = str(r.get('Item') or '').strip()
+        if not name: continue
+        cols['Items'].append(name)
+        cols['Demand'].append(max(safe_float(r.get('Demand')), 0))
+        cols['Cost'].append(max(safe_float(r.get('Cost')), 0))
+        cols['OrderCost'].append(max(safe_float(r.get('OrderCost')), 0))
+        cols['HoldingRate'].append(max(safe_float(r.get('Holding'), 25), 0) / 100)
+        cols['LeadTime'].append(max(safe_float(r.get('LeadTime')), 0))
+        cols['StdDev'].append(max(safe_float(r.get('StdDev')), 0))
+        cols['Space'].append(max(safe_float(r.get('Space')), 0))
+
+    params = {
+        **cols,
+        'ServiceLevel': safe_float(data_inputs.get('service'), 95) / 100,
+        'Capacity': safe_float(data_inputs.get('capacity'), 0),
+        'Budget': safe_float(data_inputs.get('budget'), 0)
+    }
+    param_list = [{'name': k, 'shape': 'list' if isinstance(v, list) else 'scalar', 'data': v} for k, v in params.items()]
+    return params, param_list
+
+# --- 3. Result Analytics ---
+def process_results(res, store):
+    policy = res.get('policy', {})
+    items = policy.get('Items', [])
+
+    table_rows = []
+    for i, item in enumerate(items):
+        q, s, cycle = policy['Q'][i], policy['ReorderPoint'][i], policy['CycleDays'][i]
+        every = f" (every {cycle:,.0f} days)" if cycle > 0 else ""
+        table_rows.append({
+            'Stock': item,
+            'Plan': f"Reorder at {s:,.0f} -> order {q:,.0f}{every}, up to {policy['OrderUpTo'][i]:,.0f}",
+            'Usage': f"${policy['AnnualCost'][i]:,.2f}/yr"
+        })
+
+    top = sorted(range(len(items)), key=lambda i: policy['AnnualCost'][i], reverse=True)[:TOP_N_CHART]
+    fig = go.Figure(go.Bar(
+        x=[items[i] for i in top], y=[policy['AnnualCost'][i] for i in top], marker_color='#4a4e69',
+        hovertemplate="<b>%{x}</b><br>Annual Cost: $%{y:,.2f}<extra></extra>"
+    ))
+    fig.update_layout(
+        title=f'Annual Inventory Cost (Top {len(top)})', xaxis_title='Item', yaxis_title='Cost ($/yr)',
+        template='plotly_white', height=350, margin=dict(l=40, r=40, t=40, b=40)
+    )
+
+    report_md = "### Inventory Summary\n\n"
+    report_md += f"* **Items:** `{len(items):,}`\n"
+    report_md += f"* **Total Annual Cost:** `${res['objective']:,.2f}`\n"
+    report_md += f"* **Safety Stock Held:** `{sum(policy.get('SafetyStock', [])):,.0f}` units\n\n"
+    for c in res.get('constraints', []):
+        if c['Shadow Price'] > 0:
+            report_md += f"* **{c['Constraint']} is binding:** order sizes were reduced to fit. One more unit of {c['Constraint'].lower()} is worth `${c['Shadow Price']:,.4f}`/yr.\n"
+        else:
+            report_md += f"* **{c['Constraint']}:** not binding (slack `{c['Slack']:,.2f}`).\n"
+
+    return fig, table_rows, report_md
@@ -0,0 +1,137 @@
+# modules/inventory/logic.py
+import sys
+import time
+from statistics import NormalDist
+import numpy as np
+
+DAYS_PER_YEAR = 365
+DUAL_ITERS = 60      # bisection steps per multiplier
+DUAL_ROUNDS = 8      # alternations between the capacity and budget multipliers
+
+def bridge_inventory(params):
+    """
+    Inventory is solved by the vectorized engine (solve_inventory).
+    The text only documents the policy model in the Advanced view.
+    """
+    if not params.get('Items'): return "", "", []
+    objective_str = "sum(Demand[i] / Q[i] * OrderCost[i] + Holding[i] * Cost[i] * (Q[i] / 2 + SafetyStock[i]) for i in Items)"
+    constraints = []
+    if params.get('Capacity'): constraints.append("sum(Space[i] * (Q[i] + SafetyStock[i]) for i in Items) <= Capacity")
+    if params.get('Budget'): constraints.append("sum(Cost[i] * (Q[i] + SafetyStock[i]) for i in Items) <= Budget")
+    return objective_str, "\n".join(constraints), []
+
+def _eoq(D, K, h, lam=0.0, w=0.0, mu=0.0, c=0.0):
+    # Per-SKU optimum of the (relaxed) problem: closed form, all SKUs at once
+    return np.sqrt(2 * D * K / np.maximum(h + 2 * lam * w + 2 * mu * c, 1e-12))
+
+def _bisect(f, rhs):
+    # Smallest multiplier >= 0 with f(multiplier) <= rhs (f is non-increasing)
+    lo, hi = 0.0, 1.0
+    while f(hi) > rhs and hi < 1e12: hi *= 10
+    for _ in range(DUAL_ITERS):
+        mid = (lo + hi) / 2
+        if f(mid) > rhs: lo = mid
+        else: hi = mid
+    return hi
+
+def solve_inventory(params):
+    """
+    Multi-SKU (s, S) policies.
+
+    1. Every SKU gets its closed-form EOQ / safety stock as NumPy arrays.
+    2. If the plan breaks a shared limit (warehouse space, stock budget),
+       the limit is priced in by Lagrangian multipliers: each SKU's subproblem
+       stays a closed-form EOQ with an inflated holding cost, so all SKUs are
+       still solved independently in one vector operation. Multipliers are
+       found by bisection.
+    """
+    print("----- [Inventory Engine] Start -----")
+    t0 = time.time()
+    items = params.get('Items', [])
+    if not items:
+        return {'status': 'Error', 'error_msg': "Inventory Error: add at least one item."}
+
+    D = np.asarray(params['Demand'], dtype=float)
+    c = np.asarray(params['Cost'], dtype=float)
+    K = np.asarray(params['OrderCost'], dtype=float)
+    h = np.asarray(params['HoldingRate'], dtype=float) * c
+    L = np.asarray(params['LeadTime'], dtype=float)
+    sigma = np.asarray(params['StdDev'], dtype=float)
+    w = np.asarray(params['Space'], dtype=float)
+    capacity = params.get('Capacity') or 0
+    budget = params.get('Budget') or 0
+    z = NormalDist().inv_cdf(min(max(params.get('ServiceLevel', 0.95), 0.5), 0.9999))
+
+    # No holding cost: ordering less often always pays, the EOQ has no optimum
+    free = np.flatnonzero((h <= 0) & (D > 0) & (K > 0))
+    if free.size:
+        names = ", ".join(items[i] for i in free[:5]) + (f" and {free.size - 5} more" if free.size > 5 else "")
+        return {'status': 'Error', 'error_msg': f"Inventory Error: {names} cost nothing to hold (Cost or Holding % is 0), so there is no optimal order size. Enter a unit cost and holding rate above 0."}
+
+    # 1. Closed-form policy
+    daily = D / DAYS_PER_YEAR
+    safety = z * sigma * np.sqrt(L)
+    Q = _eoq(D, K, h)
+
+    # 2. Shared resources
+    lam = mu = 0.0
+    space_use = lambda q: float(np.sum(w * (q + safety)))
+    money_use = lambda q: float(np.sum(c * (q + safety)))
+    constrained = (capacity and space_use(Q) > capacity) or (budget and money_use(Q) > budget)
+    if constrained:
+        if (capacity and space_use(0) > capacity) or (budget and money_use(0) > budget):
+            return {'status': 'Infeasible', 'objective': 0, 'variables': [], 'constraints': [],
+                    'error_msg': "### ⚠️ Infeasible Problem\nSafety stock alone exceeds the warehouse capacity or budget. Lower the service level or raise the limit."}
+        for _ in range(DUAL_ROUNDS):
+            if capacity: lam = _bisect(lambda l: space_use(_eoq(D, K, h, l, w, mu, c)), capacity)
+            if budget: mu = _bisect(lambda m: money_use(_eoq(D, K, h, lam, w, m, c)), budget)
+        Q = _eoq(D, K, h, lam, w, mu, c)
+
+    # Whole units; fall back to rounding down if rounding broke a shared limit
+    Q_cont = Q
+    Q = np.maximum(np.round(Q_cont), 1.0)
+    if (capacity and space_use(Q) > capacity) or (budget and money_use(Q) > budget):
+        Q = np.maximum(np.floor(Q_cont), 1.0)
+    reorder = np.ceil(daily * L + safety)
+    order_up_to = reorder + Q
+    cycle_days = np.where(daily > 0, Q / np.maximum(daily, 1e-12), 0.0)
+    annual_cost = np.where(D > 0, D / Q * K, 0) + h * (Q / 2 + safety)
+
+    constraints_data = []
+    if capacity: constraints_data.append({'Constraint': 'Capacity', 'Shadow Price': lam, 'Slack': capacity - space_use(Q)})
+    if budget: constraints_data.append({'Constraint': 'Budget', 'Shadow Price': mu, 'Slack': budget - money_use(Q)})
+
+    print(f"[Inventory Engine] {len(items)} SKUs, constrained={bool(constrained)}, {time.time() - t0:.3f}s")
+    return {
+        'status': 'Optimal',
+        'objective': float(annual_cost.sum()),
+        'variables': [{'Variable': f"Q_{i}", 'Value': q} for i, q in zip(items, Q.tolist())],
+        'constraints': constraints_data,
+        'policy': {
+            'Items': items, 'Q': Q.tolist(), 'ReorderPoint': reorder.tolist(), 'OrderUpTo': order_up_to.tolist(),
+            'SafetyStock': safety.tolist(), 'CycleDays': cycle_days.tolist(), 'AnnualCost': annual_cost.tolist()
+        }
+    }
+
+def run_batch(in_csv, out_csv, capacity=0, budget=0, service_level=0.95):
+    """
+    Full-catalog recompute: python -m modules.inventory.logic catalog.csv policies.csv
+    CSV columns: Item, Demand, Cost, OrderCost, Holding (rate), LeadTime, StdDev, Space
+    """
+    import pandas as pd
+    df = pd.read_csv(in_csv)
+    params = {
+        'Items': df['Item'].astype(str).tolist(),
+        'Demand': df['Demand'].to_numpy(float), 'Cost': df['Cost'].to_numpy(float),
+        'OrderCost': df['OrderCost'].to_numpy(float), 'HoldingRate': df['Holding'].to_numpy(float),
+        'LeadTime': df['LeadTime'].to_numpy(float), 'StdDev': df['StdDev'].to_numpy(float),
+        'Space': df['Space'].to_numpy(float) if 'Space' in df else np.zeros(len(df)),
+        'Capacity': capacity, 'Budget': budget, 'ServiceLevel': service_level
+    }
+    res = solve_inventory(params)
+    if 'policy' not in res: raise SystemExit(res.get('error_msg'))
+    pd.DataFrame(res['policy']).to_csv(out_csv, index=False)
+    return res
+
+if __name__ == '__main__':
+    run_batch(*sys.argv[1:3], *[float(a) for a in sys.argv[3:6]])
@@ -0,0 +1,117 @@
+# modules/schedule/analytics.py
+from dash import html, dash_table, dcc
+import plotly.graph_objects as go
+from common.styles import *
+from common.inputs import number_input, safe_float
+from modules.schedule.logic import DAYS
+
+# --- 1. UI Rendering Function ---
+def render_input():
+    day_cols = [{'name': d, 'id': d, 'type': 'numeric', 'editable': True} for d in DAYS]
+    return html.Div([
+        html.H4("📅 Scheduling", style={'color': '#4a4e69', 'fontWeight': '800', 'marginBottom': '5px'}),
+        html.P("Weekly availability (1 = can work, 0 = off). The pattern repeats over the horizon.", style={'color': '#888', 'fontSize': '13px', 'marginBottom': '20px'}),
+
+        html.Div([
+            number_input("Weeks:", 'sched-weeks', 1),
+            number_input("Shift (h):", 'sched-shift-hours', 8, 0.5),
+            number_input("Max h/week:", 'sched-max-hours', 40, 0.5),
+            number_input("Max consecutive days:", 'sched-max-consec', 5),
+        ], style={'display': 'flex', 'flexWrap': 'wrap', 'marginBottom': '15px'}),
+
+        # Table 1: Coverage
+        html.Label("1. Staff Required per Day", style={'fontWeight': '600', 'color': '#333', 'display': 'block', 'marginBottom': '5px'}),
+        dash_table.DataTable(
+            id='sched-demand', columns=day_cols,
+            data=[{'Mon': 2, 'Tue': 2, 'Wed': 2, 'Thu': 2, 'Fri': 3, 'Sat': 3, 'Sun': 1}],
+            editable=True, style_table=TABLE_CONTAINER_STYLE, css=FIXED_CSS, style_header=TABLE_HEADER_STYLE, style_cell=TABLE_CELL_STYLE
+        ),
+
+        # Table 2: Availability
+        html.Label("2. Availability", style={'fontWeight': '600', 'color': '#333', 'marginTop': '10px', 'display': 'block', 'marginBottom': '5px'}),
+        dash_table.DataTable(
+            id='sched-matrix',
+            columns=[{'name': 'Staff', 'id': 'staff', 'editable': True}] + day_cols,
+            data=[{'staff': f"Staff{i}", **{d: 1 for d in DAYS}} for i in range(1, 6)],
+            editable=True, row_deletable=True,
+            style_table=TABLE_CONTAINER_STYLE, css=FIXED_CSS, style_header=TABLE_HEADER_STYLE, style_cell=TABLE_CELL_STYLE
+        ),
+        html.Button("＋ Staff", id='btn-add-staff', n_clicks=0, style=ADD_BTN_STYLE)
+    ])
+
+# --- 2. Data Parsing ---
+def get_params(data_inputs):
+    if not data_inputs: data_inputs = {}
+    sched_data = data_inputs.get('sched_matrix', []) or []
+    demand_rows = data_inputs.get('sched_demand', []) or [{}]
+
+    staff = []
+    availability = {}
+    for r in sched_data:
+        name = str(r.get('staff') or '').strip()
+        if not name or name in availability: continue
+        staff.append(name)
+        availability[name] = [1 if safe_float(r.get(d), 0) > 0 else 0 for d in DAYS]
+
+    required = [int(safe_float(demand_rows[0].get(d), 0)) for d in DAYS]
+    weeks = max(1, int(safe_float(data_inputs.get('weeks'), 1)))
+
+    params = {
+        'Staff': staff, 'Availability': availability, 'Required': required, 'Weeks': weeks,
+        'ShiftHours': safe_float(data_inputs.get('shift_hours'), 8),
+        'MaxHours': safe_float(data_inputs.get('max_hours'), 40),
+        'MaxConsec': max(1, int(safe_float(data_inputs.get('max_consec'), 5))),
+        'MinRest': 11
+    }
+    param_list = [{'name': k, 'shape': 'dict' if isinstance(v, dict) else ('list' if isinstance(v, list) else 'scalar'), 'data': v} for k, v in params.items()]
+    return params, param_list
+
+# --- 3. Result Analytics ---
+def process_results(res, store):
+    params = {p['name']: p['data'] for p in store['parameters']}
+    staff = params.get('Staff', [])
+    required = params.get('Required', [0] * 7)
+    hours = params.get('ShiftHours', 8)
+    weeks = params.get('Weeks', 1)
+    roster = res.get('roster', {})
+    shortages = res.get('shortages', {})
+
+    horizon = list(range(weeks * 7))
+    labels = [f"W{d // 7 + 1} {DAYS[d % 7]}" for d in horizon]
+    scheduled = [0] * len(horizon)
+    for days in roster.values():
+        for d in days: scheduled[d] += 1
+
+    table_rows = []
+    for s in staff:
+        days = roster.get(s, [])
+        plan = ", ".join(labels[d] for d in days) if days else "Off"
+        table_rows.append({'Stock': s, 'Plan': plan, 'Usage': f"{len(days) * hours:g} h"})
+
+    fig = go.Figure()
+    fig.add_trace(go.Bar(name='Scheduled', x=labels, y=scheduled, marker_color='#4a4e69'))
+    fig.add_trace(go.Scatter(name='Required', x=labels, y=[required[d % 7] for d in horizon], mode='lines+markers', line={'color': '#e07a5f'}))
+    fig.update_layout(
+        title='Coverage', xaxis_title='Day', yaxis_title='Staff',
+        template='plotly_white', height=350, margin=dict(l=40, r=40, t=40, b=40)
+    )
+
+    total_short = sum(shortages.values())
+    loads = [len(roster.get(s, [])) * hours for s in staff]
+
+    report_md = "### Roster Summary\n\n"
+    report_md += f"* **Scheduled Hours:** `{sum(loads):,.1f} h`\n"
+    report_md += f"* **Staff Used:** `{sum(1 for l in loads if l > 0)}` / `{len(staff)}`\n"
+    if loads:
+        report_md += f"* **Hours per Person:** min `{min(loads):g} h`, max `{max(loads):g} h`\n"
+    report_md += f"* **Solved as:** `{res.get('blocks', 1)}` weekly block(s), `{res.get('stitched', 0)}` re-stitched\n\n"
+
+    if total_short > 0:
+        short_days = [f"{labels[int(d)]} (-{n})" for d, n in sorted(shortages.items(), key=lambda kv: int(kv[0])) if n > 0]
+        report_md += "### ⚠️ Coverage Gaps\n"
+        report_md += f"* **Missing Shifts:** `{total_short}` on {', '.join(short_days)}\n"
+        report_md += "* Add staff availability on those days or relax the hour/rest limits.\n"
+    else:
+        report_md += "### Coverage\n* ✅ Every day is fully covered.\n"
+
+    return fig, table_rows, report_md
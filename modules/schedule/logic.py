@@ -0,0 +1,183 @@
+# modules/schedule/logic.py
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+import pulp
+import solver_engine
+import solver_pool
+
+DAYS = ['Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun']
+SHORTAGE_PENALTY = 1000   # per missing person-shift (coverage is soft)
+FAIRNESS_WEIGHT = 0.01    # tie-breaker: spread shifts evenly
+BLOCK_TIME_LIMIT = 30
+
+def bridge_schedule(params):
+    """
+    The roster is solved by the native engine (solve_schedule), not through
+    per-constraint strings. The text returned here only documents the model
+    in the Advanced view.
+    """
+    staff = params.get('Staff', [])
+    if not staff: return "", "", []
+
+    objective_str = f"sum(Hours * Work[s][d] for s in Staff for d in Days) + {SHORTAGE_PENALTY} * sum(Short[d] for d in Days)"
+    constraints = [
+        "sum(Work[s][d] for s in Staff) + Short[d] >= Required[d]    # coverage, every day d",
+        "sum(Hours * Work[s][d] for d in week) <= MaxHours    # legal weekly hours, every s",
+        "sum(Work[s][d] for d in window(MaxConsec + 1)) <= MaxConsec    # rest days, every s",
+        "Work[s][d] == 0    # where Availability[s][d] == 0",
+    ]
+    return objective_str, "\n".join(constraints), []
+
+def _solve_block(block_days, params, carry_in=None):
+    """
+    One week of the roster. Only available (staff, day) pairs get a variable,
+    and rows are built directly as sparse affine expressions.
+    carry_in: {staff: consecutive days worked right before this block, over
+    the whole stitched roster (a run can span several earlier weeks)}
+    """
+    staff = params['Staff']
+    avail = params['Availability']
+    required = params['Required']
+    hours = params['ShiftHours']
+    max_hours = params['MaxHours']
+    max_consec = params['MaxConsec']
+    carry_in = carry_in or {}
+
+    prob = pulp.LpProblem(f"Roster_D{block_days[0]}", pulp.LpMinimize)
+
+    # 1. Sparse variables
+    work = {}
+    for s in staff:
+        for d in block_days:
+            if avail[s][d % 7]:
+                work[s, d] = pulp.LpVariable(f"W_{len(work)}", cat=pulp.LpBinary)
+    short = {d: pulp.LpVariable(f"S_{d}", lowBound=0) for d in block_days}
+    peak = pulp.LpVariable("Peak", lowBound=0)
+
+    # 2. Objective
+    prob += pulp.LpAffineExpression(
+        [(v, hours) for v in work.values()] + [(v, SHORTAGE_PENALTY) for v in short.values()] + [(peak, FAIRNESS_WEIGHT)]
+    )
+
+    # 3. Coverage
+    for d in block_days:
+        terms = [(work[s, d], 1) for s in staff if (s, d) in work] + [(short[d], 1)]
+        prob += pulp.LpConstraint(pulp.LpAffineExpression(terms), pulp.LpConstraintGE, f"Cover_{d}", required[d % 7])
+
+    # 4. Per-person hours, fairness and rest windows
+    for s_idx, s in enumerate(staff):
+        mine = [(d, work[s, d]) for d in block_days if (s, d) in work]
+        if not mine: continue
+        prob += pulp.LpConstraint(pulp.LpAffineExpression([(v, hours) for _, v in mine]), pulp.LpConstraintLE, f"Hours_{s_idx}", max_hours)
+        prob += pulp.LpConstraint(pulp.LpAffineExpression([(v, 1) for _, v in mine] + [(peak, -1)]), pulp.LpConstraintLE, f"Fair_{s_idx}", 0)
+
+        if max_consec < len(block_days):
+            for w_start in range(len(block_days) - max_consec):
+                window = block_days[w_start:w_start + max_consec + 1]
+                terms = [(work[s, d], 1) for d in window if (s, d) in work]
+                if len(terms) > max_consec:
+                    prob += pulp.LpConstraint(pulp.LpAffineExpression(terms), pulp.LpConstraintLE, f"Rest_{s_idx}_{w_start}", max_consec)
+
+        # Windows straddling the earlier blocks (only used when stitching): the
+        # last j days before the block are worked, so the block's first
+        # max_consec + 1 - j days hold at most max_consec - j shifts. Windows
+        # lying entirely before the block are already fixed, hence j <= max_consec.
+        carried = carry_in.get(s, 0)
+        for j in range(1, min(carried, max_consec) + 1):
+            window = block_days[:max_consec + 1 - j]
+            terms = [(work[s, d], 1) for d in window if (s, d) in work]
+            if len(terms) > max_consec - j:
+                prob += pulp.LpConstraint(pulp.LpAffineExpression(terms), pulp.LpConstraintLE, f"Carry_{s_idx}_{j}", max_consec - j)
+
+    prob.solve(solver_engine.make_solver(time_limit=BLOCK_TIME_LIMIT))
+    status = pulp.LpStatus[prob.status]
+    assigned = {s: [] for s in staff}
+    for (s, d), v in work.items():
+        if (v.varValue or 0) > 0.5: assigned[s].append(d)
+    shortages = {d: int(round(short[d].varValue or 0)) for d in block_days}
+    return status, assigned, shortages
+
+def _run_length(days_worked, end_day):
+    # Consecutive days worked ending at end_day (inclusive)
+    worked = set(days_worked)
+    n = 0
+    while (end_day - n) in worked: n += 1
+    return n
+
+def _lead_length(days_worked, start_day):
+    worked = set(days_worked)
+    n = 0
+    while (start_day + n) in worked: n += 1
+    return n
+
+def solve_schedule(params, workers=None):
+    """
+    Rostering by weekly decomposition:
+    1. Every week is an independent MIP (weekly hours are per week anyway).
+       The weeks only run concurrently when the caller's CPU budget allows
+       (`workers`, or a solver slot with OPTIMYSTIC_SOLVER_THREADS > 1); in a
+       default app slot they are solved one after another.
+    2. Stitch: weeks are joined in order; a week whose opening run breaks the
+       max-consecutive-days rule across the boundary is re-solved with the
+       trailing runs of the stitched roster so far carried in (runs may span
+       several earlier weeks when MaxConsec >= 7).
+    """
+    print("----- [Schedule Engine] Start -----")
+    t0 = time.time()
+    staff = params.get('Staff', [])
+    weeks = int(params.get('Weeks', 1))
+    hours = params.get('ShiftHours', 8)
+    min_rest = params.get('MinRest', 11)
+    max_consec = params.get('MaxConsec', 6)
+
+    if not staff:
+        return {'status': 'Error', 'error_msg': "Scheduling Error: add at least one staff member."}
+    if hours + min_rest > 24:
+        return {'status': 'Error', 'error_msg': f"Scheduling Error: a {hours}h shift leaves less than the legal {min_rest}h rest before the next day's shift."}
+
+    blocks = [list(range(w * 7, w * 7 + 7)) for w in range(weeks)]
+
+    try:
+        # 1. Per-week solve (each block is its own CBC process), as many at
+        #    once as the CPU budget: a solver slot's threads (1 by default, so
+        #    sequential in the app), else the machine's cores.
+        slot = solver_pool.current_slot()
+        n_workers = workers or min(len(blocks), slot['threads'] if slot else os.cpu_count() or 1)
+        with ThreadPoolExecutor(max_workers=n_workers) as pool:
+            results = list(pool.map(solver_pool.bind(lambda b: _solve_block(b, params)), blocks))
+
+        # 2. Stitch week boundaries
+        repaired = 0
+        for w in range(1, len(blocks)):
+            stitched = {s: [d for r in results[:w] for d in r[1][s]] for s in staff}
+            cur_assigned = results[w][1]
+            boundary = blocks[w][0]
+            carry = {s: _run_length(stitched[s], boundary - 1) for s in staff}
+            if any(carry[s] + _lead_length(cur_assigned[s], boundary) > max_consec for s in staff):
+                results[w] = _solve_block(blocks[w], params, carry_in=carry)
+                repaired += 1
+    except Exception as e:
+        import traceback
+        traceback.print_exc()
+        return {'status': 'Error', 'error_msg': f"System Error:\n{str(e)}"}
+
+    statuses = [r[0] for r in results]
+    status = 'Optimal' if all(st == 'Optimal' for st in statuses) else next(st for st in statuses if st != 'Optimal')
+
+    roster = {s: sorted(d for r in results for d in r[1][s]) for s in staff}
+    shortages = {d: n for r in results for d, n in r[2].items()}
+    total_hours = hours * sum(len(d) for d in roster.values())
+
+    res_vars = [{'Variable': f"Work_{s}_{DAYS[d % 7]}W{d // 7 + 1}", 'Value': 1} for s in staff for d in roster[s]]
+    print(f"[Schedule Engine] {len(blocks)} block(s), {repaired} stitched, {time.time() - t0:.2f}s")
+    return {
+        'status': status,
+        'objective': total_hours,
+        'variables': res_vars,
+        'constraints': [],
+        'roster': roster,
+        'shortages': shortages,
+        'blocks': len(blocks),
+        'stitched': repaired
+    }
@@ -1,9 +1,35 @@
 import pulp
 import time
+import expr_compiler
+import model_cache
+import solver_pool
+import var_blocks
+
+# Big models report only this many constraint rows (the tightest ones)
+MAX_CONSTRAINT_ROWS = 500
+
+def is_binary(v):
+    # PuLP stores LpBinary as an Integer variable bounded to [0, 1]
+    return v.cat == pulp.LpInteger and v.lowBound == 0 and v.upBound == 1
+
+def make_solver(time_limit=60, warm_start=False):
+    # Inside a solver pool slot: the slot's thread budget and the session's temp dir
+    slot = solver_pool.current_slot()
+    solver = pulp.PULP_CBC_CMD(msg=False, timeLimit=time_limit, warmStart=warm_start, threads=slot['threads'] if slot else None)
+    if slot: solver.tmpDir = slot['tmp_dir']
+    return solver
+
+def build_problem(store_data, sense, objective_str, constraints_str, fixed=None):
+    """
+    Steps 1-5 of the engine: parameters, variables, objective, constraints.
+    Variables named in `fixed` enter the expressions as their numeric value,
+    so they never reach the solver and rows left without variables are only
+    checked. Returns (prob, symbol_table, None) or (None, None, error_result).
+    """
+    fixed = fixed or {}
+    def lp_var(name, cat):
+        return fixed[name] if name in fixed else pulp.LpVariable(name, lowBound=0, cat=cat)
 
-def solve_model(store_data, sense, objective_str, constraints_str):
-    print("----- [Engine] Start -----")
-    
     # 1. Setup Context
     variables = store_data.get('variables', [])
     parameters = store_data.get('parameters', [])
@@ -12,137 +38,286 @@ def solve_model(store_data, sense, objective_str, constraints_str):
     lp_sense = pulp.LpMinimize if sense == 'minimize' else pulp.LpMaximize
     prob = pulp.LpProblem("OptiMystic_Problem", lp_sense)
     
-    symbol_table = {'pulp': pulp, 'prob': prob}
+    symbol_table = {}
     
+    # 2. Process Parameters
+    for p in parameters:
+        name = p['name']
+        data = p['data']
+        symbol_table[name] = data
+
+    # 3. Process Variables
+    for v in variables:
+        var_name = v['name']
+        var_type = v.get('type', 'Continuous')
+        cat = pulp.LpInteger if var_type == 'Integer' else (pulp.LpBinary if var_type == 'Binary' else pulp.LpContinuous)
+        
+        # Shape Handling
+        shape = v.get('shape', 'scalar')
+        if shape == 'list':
+            indices = range(len(v['data']))
+            symbol_table[var_name] = [lp_var(f"{var_name}_{i}", cat) for i in indices]
+        elif shape == 'matrix':
+            rows = v['data']
+            matrix_vars = {}
+            for r_idx, row_data in enumerate(rows):
+                r_lbl = row_data.get('row_label', f"R{r_idx}")
+                matrix_vars[r_lbl] = {}
+                for col_key in row_data.keys():
+                    if col_key == 'row_label': continue
+                    var_id = f"{var_name}_{r_lbl}_{col_key}"
+                    matrix_vars[r_lbl][col_key] = lp_var(var_id, cat)
+            symbol_table[var_name] = matrix_vars
+        elif shape == 'block':
+            # One scalar per generated name (the block itself holds no objects)
+            for name in var_blocks.names(v):
+                symbol_table[name] = lp_var(name, cat)
+        else:
+            symbol_table[var_name] = lp_var(var_name, cat)
+
+    # 4. Objective (whitelisted, cached expressions; no raw eval)
+    expr_compiler.prepare(symbol_table)
     try:
-        # 2. Process Parameters
-        for p in parameters:
-            name = p['name']
-            data = p['data']
-            symbol_table[name] = data
-
-        # 3. Process Variables
-        for v in variables:
-            var_name = v['name']
-            var_type = v.get('type', 'Continuous')
-            cat = pulp.LpInteger if var_type == 'Integer' else (pulp.LpBinary if var_type == 'Binary' else pulp.LpContinuous)
-            
-            # Shape Handling
-            shape = v.get('shape', 'scalar')
-            if shape == 'list':
-                indices = range(len(v['data']))
-                symbol_table[var_name] = [pulp.LpVariable(f"{var_name}_{i}", lowBound=0, cat=cat) for i in indices]
-            elif shape == 'matrix':
-                rows = v['data']
-                matrix_vars = {}
-                for r_idx, row_data in enumerate(rows):
-                    r_lbl = row_data.get('row_label', f"R{r_idx}")
-                    matrix_vars[r_lbl] = {}
-                    for col_key in row_data.keys():
-                        if col_key == 'row_label': continue
-                        var_id = f"{var_name}_{r_lbl}_{col_key}"
-                        matrix_vars[r_lbl][col_key] = pulp.LpVariable(var_id, lowBound=0, cat=cat)
-                symbol_table[var_name] = matrix_vars
-            else:
-                symbol_table[var_name] = pulp.LpVariable(var_name, lowBound=0, cat=cat)
+        obj_expr = expr_compiler.evaluate(objective_str, symbol_table)
+        if not isinstance(obj_expr, pulp.LpAffineExpression):
+            obj_expr = pulp.LpAffineExpression(constant=obj_expr)
+        prob += obj_expr
+    except Exception as e:
+        return None, None, {'status': 'Error', 'error_msg': f"Objective Logic Error: {e}"}
 
-        # 4. Objective
-        symbol_table['range'] = range
-        symbol_table['len'] = len
+    # 5. Constraints
+    cons_lines = [line.strip() for line in constraints_str.split('\n') if line.strip()]
+    for idx, line in enumerate(cons_lines):
         try:
-            obj_expr = eval(objective_str, symbol_table, symbol_table)
-            prob += obj_expr
+            con_expr = expr_compiler.evaluate(line, symbol_table)
         except Exception as e:
-            return {'status': 'Error', 'error_msg': f"Objective Logic Error: {e}"}
+            return None, None, {'status': 'Error', 'error_msg': f"Constraint Error (Line {idx+1}): {e}"}
+        if isinstance(con_expr, bool) or (isinstance(con_expr, pulp.LpConstraint) and not con_expr.keys()):
+            # Only fixed variables in this row: nothing left to solve, just check it
+            if (con_expr if isinstance(con_expr, bool) else con_expr.valid()): continue
+            return None, None, {'status': 'Infeasible', 'objective': 0, 'variables': [], 'constraints': [],
+                                'error_msg': f"### ⚠️ Infeasible Problem\nThe fixed values break constraint line {idx+1}."}
+        prob += (con_expr, f"C_{idx}")
 
-        # 5. Constraints
-        cons_lines = [line.strip() for line in constraints_str.split('\n') if line.strip()]
-        for idx, line in enumerate(cons_lines):
-            try:
-                con_expr = eval(line, symbol_table, symbol_table)
-                prob += (con_expr, f"C_{idx}")
-            except Exception as e:
-                return {'status': 'Error', 'error_msg': f"Constraint Error (Line {idx+1}): {e}"}
+    return prob, symbol_table, None
+
+def diagnose_infeasible(symbol_table):
+    print("[Engine] ⚠️ Infeasible detected. Starting Analysis...")
+    
+    # Calculate Total Supply vs Total Demand (Heuristic)
+    total_supply = 0
+    total_demand = 0
+    
+    # Extract Data safely
+    stocks = symbol_table.get('Stocks', [])
+    items = symbol_table.get('Items', [])
+    demands = symbol_table.get('Demands', {})
+    item_lens = symbol_table.get('ItemLens', [])
+    
+    if stocks and items:
+        # 1. Check Capacity
+        for s in stocks:
+            total_supply += (float(s['Length']) * float(s['Limit']))
+        
+        for i, l in zip(items, item_lens):
+            qty = demands.get(i, 0)
+            total_demand += (float(l) * float(qty))
+            
+        gap = total_demand - total_supply
+        
+        diagnosis_msg = "### ⚠️ Optimization Failed (Infeasible)\n"
+        diagnosis_msg += "The solver cannot find a solution. Here is the AI diagnosis:\n\n"
+        
+        if gap > 0:
+            diagnosis_msg += f"**1. Critical Material Shortage:**\n"
+            diagnosis_msg += f"- You need at least **{gap:,.0f} mm** more material.\n"
+            diagnosis_msg += f"- Total Demand: {total_demand:,.0f} mm\n"
+            diagnosis_msg += f"- Max Supply: {total_supply:,.0f} mm\n\n"
+        else:
+            diagnosis_msg += "**1. Stock Length Issue:**\n"
+            diagnosis_msg += "- You have enough total length, but individual items might be longer than your longest stock bar.\n\n"
+        
+        diagnosis_msg += "**👉 Suggested Actions:**\n"
+        diagnosis_msg += "- Increase the 'Limit' (quantity) of your stocks.\n"
+        diagnosis_msg += "- Add a new longer stock type."
+        
+        return {
+            'status': 'Infeasible',
+            'objective': 0,
+            'variables': [],
+            'constraints': [],
+            'error_msg': diagnosis_msg
+        }
+    else:
+        # Fallback for non-cutting problems
+        return {
+            'status': 'Infeasible',
+            'objective': 0,
+            'variables': [],
+            'constraints': [],
+            'error_msg': "### ⚠️ Infeasible Problem\nThe constraints are too tight. Please check your logic."
+        }
+
+def compact_constraints(constraints_data):
+    """
+    Above MAX_CONSTRAINT_ROWS rows, keeps the rows that explain the solution:
+    nonzero shadow prices first, then the lowest slack (binding rows, also in
+    a MIP where CBC reports no duals). A last row says how many are hidden.
+    """
+    if len(constraints_data) <= MAX_CONSTRAINT_ROWS: return constraints_data
+    ranked = sorted(constraints_data, key=lambda c: (abs(c['Shadow Price'] or 0) <= 1e-9, abs(c['Slack'] or 0)))
+    hidden = len(constraints_data) - MAX_CONSTRAINT_ROWS
+    return ranked[:MAX_CONSTRAINT_ROWS] + [{'Constraint': f"({hidden:,} rows with more slack hidden)", 'Shadow Price': None, 'Slack': None}]
+
+def collect_results(prob, status, objective=None):
+    # Only nonzero values: absent variables are 0
+    res_vars = [{'Variable': v.name, 'Value': v.varValue} for v in prob.variables() if abs(v.varValue or 0) > 1e-9]
+    constraints_data = []
+    for name, c in prob.constraints.items():
+        try:
+            constraints_data.append({'Constraint': name, 'Shadow Price': c.pi, 'Slack': c.slack})
+        except:
+            pass 
+
+    return {
+        'status': status,
+        'objective': pulp.value(prob.objective) if objective is None else objective,
+        'variables': res_vars,
+        'constraints': compact_constraints(constraints_data)
+    }
+
+def solution_pool(prob, best_objective, pool_size, pool_gap, time_limit=20):
+    """
+    Alternative plans within `pool_gap` (relative) of the best objective.
+    
+    CBC through PuLP has no native solution pool, so alternatives come from
+    the same model: an objective bound keeps them near-optimal and a no-good
+    cut on the binary variables forbids every plan already found. Each
+    alternative is one more MIP solve, so a pool of N costs N solver runs.
+    Returns a list of {'objective', 'variables'} with nonzero values only.
+    """
+    binaries = [v for v in prob.variables() if is_binary(v)]
+    if pool_size <= 1 or not binaries: return []
+    
+    # 1. Near-optimality bound
+    slack = abs(best_objective or 0) * pool_gap + 1e-6
+    if prob.sense == pulp.LpMinimize:
+        prob += (prob.objective <= (best_objective or 0) + slack, "POOL_Bound")
+    else:
+        prob += (prob.objective >= (best_objective or 0) - slack, "POOL_Bound")
+    
+    pool = []
+    for k in range(1, pool_size):
+        # 2. No-good cut: flip at least one binary of the last plan
+        ones = [v for v in binaries if (v.varValue or 0) > 0.5]
+        zeros = [v for v in binaries if (v.varValue or 0) <= 0.5]
+        prob += (pulp.lpSum(1 - v for v in ones) + pulp.lpSum(zeros) >= 1, f"POOL_NoGood_{k}")
+        
+        prob.solve(make_solver(time_limit=time_limit))
+        if pulp.LpStatus[prob.status] != 'Optimal': break
+        pool.append({
+            'objective': pulp.value(prob.objective),
+            'variables': [{'Variable': v.name, 'Value': v.varValue} for v in prob.variables() if abs(v.varValue or 0) > 1e-9]
+        })
+    return pool
+
+def solve_model(store_data, sense, objective_str, constraints_str, pool_size=1, pool_gap=0.05):
+    print("----- [Engine] Start -----")
+    
+    try:
+        # Recurring flat-linear shapes: cached structure, only the numbers are patched in
+        if pool_size <= 1:
+            result = model_cache.solve(store_data, sense, objective_str, constraints_str, make_solver())
+            if result is not None:
+                if result['status'] == 'Infeasible':
+                    return diagnose_infeasible({p['name']: p['data'] for p in store_data.get('parameters', [])})
+                result['constraints'] = compact_constraints(result['constraints'])
+                return result
+
+        prob, symbol_table, error = build_problem(store_data, sense, objective_str, constraints_str)
+        if error: return error
 
         # 6. Solve
-        solver = pulp.PULP_CBC_CMD(msg=False, timeLimit=60)
-        prob.solve(solver)
+        prob.solve(make_solver())
         
         status = pulp.LpStatus[prob.status]
         
         # --- [PATCH] Smart Infeasible Diagnosis ---
         if status == 'Infeasible':
-            print("[Engine] ⚠️ Infeasible detected. Starting Analysis...")
-            
-            # Calculate Total Supply vs Total Demand (Heuristic)
-            total_supply = 0
-            total_demand = 0
-            
-            # Extract Data safely
-            stocks = symbol_table.get('Stocks', [])
-            items = symbol_table.get('Items', [])
-            demands = symbol_table.get('Demands', {})
-            item_lens = symbol_table.get('ItemLens', [])
-            
-            if stocks and items:
-                # 1. Check Capacity
-                for s in stocks:
-                    total_supply += (float(s['Length']) * float(s['Limit']))
-                
-                for i, l in zip(items, item_lens):
-                    qty = demands.get(i, 0)
-                    total_demand += (float(l) * float(qty))
-                    
-                gap = total_demand - total_supply
-                
-                diagnosis_msg = "### ⚠️ Optimization Failed (Infeasible)\n"
-                diagnosis_msg += "The solver cannot find a solution. Here is the AI diagnosis:\n\n"
-                
-                if gap > 0:
-                    diagnosis_msg += f"**1. Critical Material Shortage:**\n"
-                    diagnosis_msg += f"- You need at least **{gap:,.0f} mm** more material.\n"
-                    diagnosis_msg += f"- Total Demand: {total_demand:,.0f} mm\n"
-                    diagnosis_msg += f"- Max Supply: {total_supply:,.0f} mm\n\n"
-                else:
-                    diagnosis_msg += "**1. Stock Length Issue:**\n"
-                    diagnosis_msg += "- You have enough total length, but individual items might be longer than your longest stock bar.\n\n"
-                
-                diagnosis_msg += "**👉 Suggested Actions:**\n"
-                diagnosis_msg += "- Increase the 'Limit' (quantity) of your stocks.\n"
-                diagnosis_msg += "- Add a new longer stock type."
-                
-                return {
-                    'status': 'Infeasible',
-                    'objective': 0,
-                    'variables': [],
-                    'constraints': [],
-                    'error_msg': diagnosis_msg
-                }
-            else:
-                # Fallback for non-cutting problems
-                return {
-                    'status': 'Infeasible',
-                    'objective': 0,
-                    'variables': [],
-                    'constraints': [],
-                    'error_msg': "### ⚠️ Infeasible Problem\nThe constraints are too tight. Please check your logic."
-                }
+            return diagnose_infeasible(symbol_table)
 
         # Standard Success Result
-        res_vars = [{'Variable': v.name, 'Value': v.varValue} for v in prob.variables()]
-        constraints_data = []
-        for name, c in prob.constraints.items():
-            try:
-                constraints_data.append({'Constraint': name, 'Shadow Price': c.pi, 'Slack': c.slack})
-            except:
-                pass 
+        result = collect_results(prob, status)
+        
+        # 7. Alternative plans (pool[0] is always the optimum itself)
+        if pool_size > 1 and status == 'Optimal':
+            result['pool'] = [{'objective': result['objective'], 'variables': result['variables']}]
+            result['pool'] += solution_pool(prob, result['objective'], pool_size, pool_gap)
+        return result
 
-        return {
-            'status': status,
-            'objective': pulp.value(prob.objective),
-            'variables': res_vars,
-            'constraints': constraints_data
-        }
+    except Exception as e:
+        import traceback
+        traceback.print_exc()
+        return {'status': 'Error', 'error_msg': f"System Error:\n{str(e)}"}
+
+def reoptimize_model(prev_res, store_data, sense, objective_str, constraints_str, frozen_vars=(), change_penalty=1.0, time_limit=15):
+    """
+    Incremental re-solve after a mid-shift change (e.g. a rush order).
+    
+    - Variables in `frozen_vars` take their value in `prev_res` (0 if absent)
+      as constants: work already executed cannot change, and only the rest of
+      the model (the delta) is handed to the solver.
+    - Every other variable is warm-started from `prev_res`, and each unit
+      of deviation from it costs `change_penalty`, so the new plan keeps
+      as many of the old assignments as possible.
+    
+    Binary/zero-valued variables need no extra columns (|x - p| is linear
+    there); only nonzero integer/continuous values get a deviation variable.
+    The result lists the frozen values too, so it is a complete plan.
+    """
+    print("----- [Engine] Re-optimize -----")
+    prev = {v['Variable']: v['Value'] for v in (prev_res or {}).get('variables', []) if v.get('Value') is not None}
+    fixed = {name: prev.get(name, 0) or 0 for name in frozen_vars}
+    
+    try:
+        # 1. Executed work enters as constants
+        prob, symbol_table, error = build_problem(store_data, sense, objective_str, constraints_str, fixed=fixed)
+        if error: return error
+        base_objective = prob.objective
+
+        # 2. Warm start and stability term |x - p| on the open variables
+        dev_terms = []
+        for v in prob.variables():
+            p_val = prev.get(v.name, 0) or 0
+            v.setInitialValue(p_val)
+            if p_val <= 1e-9:
+                dev_terms.append(v)
+            elif is_binary(v) or (v.upBound is not None and abs(v.upBound - p_val) <= 1e-9):
+                dev_terms.append(p_val - v)
+            else:
+                d = pulp.LpVariable(f"DEV_{v.name}", lowBound=0)
+                prob += (d >= v - p_val, f"DEVP_{v.name}")
+                prob += (d >= p_val - v, f"DEVN_{v.name}")
+                dev_terms.append(d)
+
+        if dev_terms and change_penalty:
+            penalty = change_penalty * pulp.lpSum(dev_terms)
+            prob.setObjective(base_objective + penalty if prob.sense == pulp.LpMinimize else base_objective - penalty)
+
+        # 3. Solve from the previous plan
+        prob.solve(make_solver(time_limit=time_limit, warm_start=True))
+        status = pulp.LpStatus[prob.status]
+        if status == 'Infeasible':
+            return diagnose_infeasible(symbol_table)
+
+        result = collect_results(prob, status, objective=pulp.value(base_objective))
+        result['variables'] = [r for r in result['variables'] if not r['Variable'].startswith('DEV_')]
+        result['variables'] += [{'Variable': name, 'Value': val} for name, val in fixed.items() if abs(val) > 1e-9]
+        result['constraints'] = [c for c in result['constraints'] if not c['Constraint'].startswith('DEV')]
+        new = {r['Variable']: r['Value'] or 0 for r in result['variables']}
+        result['changes'] = sum(1 for name in set(new) | set(prev) if abs(new.get(name, 0) - (prev.get(name, 0) or 0)) > 1e-5)
+        result['frozen'] = len(fixed)
+        return result
 
     except Exception as e:
         import traceback
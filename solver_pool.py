@@ -0,0 +1,267 @@
+# solver_pool.py
+import os
+import shutil
+import tempfile
+import threading
+import time
+from collections import OrderedDict, deque
+import numpy as np
+import pulp
+try:
+    import fcntl
+except ImportError:       # Windows: no host-wide limit, only the per-process one
+    fcntl = None
+
+# Bounded solver concurrency for the web app. Every solve runs inside a slot:
+# at most WORKERS CBC processes at once per web process, and at most
+# HOST_SOLVES on the whole host. The host limit is shared by all web
+# processes (e.g. gunicorn workers) through locked files in SLOT_DIR, so N
+# workers never run N x WORKERS solvers. Each solve is single-threaded and
+# writes its temp files into the client's own directory.
+WORKERS = int(os.environ.get('OPTIMYSTIC_SOLVER_WORKERS', os.cpu_count() or 1))
+HOST_SOLVES = int(os.environ.get('OPTIMYSTIC_HOST_SOLVES', os.cpu_count() or 1))
+SLOT_DIR = os.environ.get('OPTIMYSTIC_SLOT_DIR', os.path.join(tempfile.gettempdir(), 'optimystic_slots'))
+MAX_QUEUE = int(os.environ.get('OPTIMYSTIC_SOLVER_QUEUE', 4 * WORKERS))   # waiting jobs, all tenants
+MAX_PER_TENANT = int(os.environ.get('OPTIMYSTIC_SOLVES_PER_CLIENT', 2))   # waiting + running jobs of one client (IP)
+MAX_WAIT = 60             # seconds in the queue before giving up
+THREADS_PER_SOLVE = int(os.environ.get('OPTIMYSTIC_SOLVER_THREADS', 1))   # CPU budget per slot (no oversubscription)
+SESSION_ROOT = os.environ.get('OPTIMYSTIC_SESSION_DIR', os.path.join(tempfile.gettempdir(), 'optimystic_sessions'))
+SESSION_TTL = 3600        # idle session directories are removed after this
+METRICS_WINDOW = 1000     # recent jobs kept for percentiles
+
+_local = threading.local()
+
+
+class PoolBusy(Exception):
+    pass
+
+
+class HostSlots:
+    """
+    Solver slots shared by every process on the host: slot i is an exclusive
+    flock on SLOT_DIR/slot-{i}.lock. The kernel drops the lock when its
+    process dies, so a crashed worker never leaks a slot.
+    """
+    def __init__(self, size=HOST_SOLVES, path=SLOT_DIR):
+        self.size = max(1, size)
+        self.path = path
+
+    def acquire(self, deadline):
+        """A held slot (file descriptor), or None if none frees up before `deadline`."""
+        if fcntl is None: return -1
+        os.makedirs(self.path, exist_ok=True)
+        while True:
+            for i in range(self.size):
+                fd = os.open(os.path.join(self.path, f"slot-{i}.lock"), os.O_CREAT | os.O_RDWR)
+                try:
+                    fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    return fd
+                except OSError:
+                    os.close(fd)
+            if time.time() >= deadline: return None
+            time.sleep(0.05)
+
+    def release(self, fd):
+        if fd is None or fd < 0: return
+        fcntl.flock(fd, fcntl.LOCK_UN)
+        os.close(fd)
+
+
+class _Ticket:
+    def __init__(self, tenant):
+        self.tenant = tenant
+        self.created = time.time()
+        self.granted = False
+
+
+def current_slot():
+    """The slot of the running job on this thread ({'tmp_dir', 'threads'}), or None."""
+    return getattr(_local, 'slot', None)
+
+
+def bind(fn):
+    """Runs fn with the caller's slot, e.g. for ThreadPoolExecutor workers inside a job."""
+    slot = current_slot()
+    def wrapped(*args, **kwargs):
+        _local.slot = slot
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            _local.slot = None
+    return wrapped
+
+
+def _percentiles(values):
+    if not values: return {'p50': 0.0, 'p99': 0.0, 'max': 0.0}
+    p50, p99 = np.percentile(values, [50, 99])
+    return {'p50': round(float(p50), 4), 'p99': round(float(p99), 4), 'max': round(float(max(values)), 4)}
+
+
+class SolverPool:
+    """
+    Admission control in front of the solver.
+
+    Jobs wait in one queue per tenant (client); free slots are handed out
+    round-robin across tenants, so one user queueing several solves cannot
+    starve the others. When the queue is full the job is rejected at once
+    with PoolBusy instead of piling up behind the others. A granted job
+    then also takes one of the host-wide slots before its solver starts.
+    """
+    def __init__(self, workers=WORKERS, max_queue=MAX_QUEUE, max_per_tenant=MAX_PER_TENANT, max_wait=MAX_WAIT, host_slots=None):
+        self.workers = max(1, workers)
+        self.host_slots = host_slots or HostSlots()
+        self.max_queue = max_queue
+        self.max_per_tenant = max_per_tenant
+        self.max_wait = max_wait
+        self._cond = threading.Condition()
+        self._queues = OrderedDict()     # tenant -> deque of waiting tickets
+        self._turn = deque()             # tenants with waiting tickets, in round-robin order
+        self._active = {}                # tenant -> waiting + running jobs
+        self._running = 0
+        self._waiting = 0
+        self._counts = {'submitted': 0, 'completed': 0, 'failed': 0, 'rejected': 0, 'timed_out': 0}
+        self._wait_times = deque(maxlen=METRICS_WINDOW)
+        self._solve_times = deque(maxlen=METRICS_WINDOW)
+        self._last_sweep = 0.0
+
+    # --- Scheduling ---
+    def _dispatch(self):
+        # Caller holds the lock
+        while self._running < self.workers and self._turn:
+            tenant = self._turn.popleft()
+            ticket = self._queues[tenant].popleft()
+            if self._queues[tenant]: self._turn.append(tenant)
+            else: del self._queues[tenant]
+            ticket.granted = True
+            self._waiting -= 1
+            self._running += 1
+        self._cond.notify_all()
+
+    def _withdraw(self, ticket):
+        queue = self._queues.get(ticket.tenant)
+        if queue is None or ticket not in queue: return
+        queue.remove(ticket)
+        if not queue:
+            del self._queues[ticket.tenant]
+            self._turn.remove(ticket.tenant)
+        self._waiting -= 1
+
+    def _release(self, tenant):
+        self._active[tenant] -= 1
+        if not self._active[tenant]: del self._active[tenant]
+
+    def run(self, tenant, fn, *args, **kwargs):
+        """
+        Runs fn(*args, **kwargs) in a slot on the calling thread.
+        Raises PoolBusy if the queue (or the tenant's share of it) is full,
+        or if no slot frees up within max_wait seconds.
+        """
+        tenant = tenant or 'anonymous'
+        ticket = _Ticket(tenant)
+        with self._cond:
+            self._counts['submitted'] += 1
+            if self._waiting >= self.max_queue or self._active.get(tenant, 0) >= self.max_per_tenant:
+                self._counts['rejected'] += 1
+                raise PoolBusy(f"{self._running} solves running, {self._waiting} waiting")
+            self._active[tenant] = self._active.get(tenant, 0) + 1
+            if tenant not in self._queues:
+                self._queues[tenant] = deque()
+                self._turn.append(tenant)
+            self._queues[tenant].append(ticket)
+            self._waiting += 1
+            self._dispatch()
+
+            deadline = ticket.created + self.max_wait
+            while not ticket.granted:
+                left = deadline - time.time()
+                if left <= 0:
+                    self._withdraw(ticket)
+                    self._release(tenant)
+                    self._counts['timed_out'] += 1
+                    raise PoolBusy(f"no solver slot within {self.max_wait}s")
+                self._cond.wait(left)
+
+        # The host-wide slot is waited for outside the lock (other processes hold them)
+        host_slot = self.host_slots.acquire(deadline)
+        if host_slot is None:
+            with self._cond:
+                self._running -= 1
+                self._release(tenant)
+                self._counts['timed_out'] += 1
+                self._dispatch()
+            raise PoolBusy(f"no host solver slot within {self.max_wait}s")
+
+        started = time.time()
+        ok = False
+        try:
+            # Inside the try: a failing slot setup must still release the slot
+            _local.slot = {'tmp_dir': self._session_dir(tenant), 'threads': THREADS_PER_SOLVE}
+            result = fn(*args, **kwargs)
+            ok = True
+            return result
+        finally:
+            _local.slot = None
+            self.host_slots.release(host_slot)
+            with self._cond:
+                self._running -= 1
+                self._release(tenant)
+                self._counts['completed' if ok else 'failed'] += 1
+                self._wait_times.append(started - ticket.created)
+                self._solve_times.append(time.time() - started)
+                self._dispatch()
+            self._sweep_sessions()
+
+    # --- Per-session temp directories ---
+    def _session_dir(self, tenant):
+        safe = "".join(ch if ch.isalnum() or ch in '-_' else '_' for ch in tenant)[:64] or 'anonymous'
+        path = os.path.join(SESSION_ROOT, safe)
+        os.makedirs(path, exist_ok=True)
+        os.utime(path)
+        return path
+
+    def _sweep_sessions(self):
+        now = time.time()
+        if now - self._last_sweep < SESSION_TTL / 10: return
+        self._last_sweep = now
+        try:
+            names = os.listdir(SESSION_ROOT)
+        except OSError:
+            return
+        with self._cond:
+            busy = set(self._active)
+        for name in names:
+            path = os.path.join(SESSION_ROOT, name)
+            try:
+                if name not in busy and now - os.path.getmtime(path) > SESSION_TTL:
+                    shutil.rmtree(path, ignore_errors=True)
+            except OSError:
+                pass
+
+    # --- Metrics ---
+    def stats(self):
+        with self._cond:
+            return {
+                'workers': self.workers, 'host_solves': self.host_slots.size, 'running': self._running, 'waiting': self._waiting,
+                'tenants_waiting': len(self._queues), 'max_queue': self.max_queue,
+                **self._counts,
+                'queue_wait_s': _percentiles(list(self._wait_times)),
+                'solve_s': _percentiles(list(self._solve_times))
+            }
+
+    def warm_up(self):
+        """
+        Solves a one-variable MIP once at start-up: CBC is spawned for real, so
+        its binary and libraries are in the page cache before the first user
+        solve. Returns False if CBC is missing or fails.
+        """
+        prob = pulp.LpProblem("warm_up", pulp.LpMaximize)
+        x = pulp.LpVariable("x", lowBound=0, upBound=1, cat=pulp.LpInteger)
+        prob += x
+        try:
+            prob.solve(pulp.PULP_CBC_CMD(msg=False))
+        except pulp.PulpSolverError:
+            return False
+        return pulp.LpStatus[prob.status] == 'Optimal'
+
+
+POOL = SolverPool()
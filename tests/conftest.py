@@ -0,0 +1,14 @@
+# tests/conftest.py
+import os
+import sys
+import tempfile
+
+# The app modules live at the repository root (no package install)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Never touch the real model cache / remnant inventory from a test run
+_scratch = tempfile.mkdtemp(prefix='optimystic-tests-')
+os.environ['OPTIMYSTIC_MODEL_CACHE'] = os.path.join(_scratch, 'model_cache')
+os.environ['OPTIMYSTIC_REMNANT_DB'] = os.path.join(_scratch, 'remnants.db')
+os.environ['OPTIMYSTIC_SESSION_DIR'] = os.path.join(_scratch, 'sessions')
+os.environ['OPTIMYSTIC_SLOT_DIR'] = os.path.join(_scratch, 'slots')
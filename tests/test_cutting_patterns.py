@@ -0,0 +1,37 @@
+# tests/test_cutting_patterns.py
+import pytest
+import modules.cutting.analytics as cut_analytics
+import modules.cutting.patterns as cut_patterns
+
+ORDERS = [(450, 12, 9), (380, 9, 7), (610, 7, 12), (720, 5, 15), (290, 14, 5), (530, 8, 10)]
+STOCKS = [{'Name': 'Short_Bar', 'Length': 1500, 'Cost': 10, 'Limit': 30}, {'Name': 'Long_Bar', 'Length': 5000, 'Cost': 28, 'Limit': 10}]
+
+
+def _params(sense, setup_cost):
+    rows = [{'Item': f"I{k}", 'Length': l, 'Demand': d, 'Price': p} for k, (l, d, p) in enumerate(ORDERS)]
+    params, _ = cut_analytics.get_params({'cut_table': rows, 'cut_stock_table': STOCKS, 'kerf_val': 3, 'setup_cost': setup_cost}, sense)
+    return params
+
+
+@pytest.mark.parametrize('setup_cost', [5, 20, 50])
+def test_single_solve_never_worse_than_pool_maximize(setup_cost):
+    params = _params('maximize', setup_cost)
+    single = cut_patterns.solve_patterns(params, pool_size=1)
+    pooled = cut_patterns.solve_patterns(params, pool_size=4)
+    assert single['status'] == pooled['status'] == 'Optimal'
+    assert single['objective'] >= max(p['objective'] for p in pooled['pool']) - 1e-6
+
+
+@pytest.mark.parametrize('setup_cost', [5, 20])
+def test_single_solve_never_worse_than_pool_minimize(setup_cost):
+    params = _params('minimize', setup_cost)
+    single = cut_patterns.solve_patterns(params, pool_size=1)
+    pooled = cut_patterns.solve_patterns(params, pool_size=4)
+    assert single['objective'] <= min(p['objective'] for p in pooled['pool']) + 1e-6
+
+
+def test_pool_plans_use_distinct_pattern_sets():
+    pooled = cut_patterns.solve_patterns(_params('minimize', 0), pool_size=4)
+    sets = [frozenset(cut_patterns.plan_patterns(p['variables'], len(ORDERS))) for p in pooled['pool']]
+    assert len(pooled['pool']) > 1
+    assert len(set(sets)) == len(sets)
@@ -0,0 +1,21 @@
+# tests/test_inventory.py
+import modules.inventory.logic as inv_logic
+
+
+def _params(costs):
+    n = len(costs)
+    return {'Items': [f"SKU_{k}" for k in range(n)], 'Demand': [1000] * n, 'Cost': costs, 'OrderCost': [50] * n,
+            'HoldingRate': [0.25] * n, 'LeadTime': [7] * n, 'StdDev': [2] * n, 'Space': [0] * n}
+
+
+def test_zero_cost_items_are_rejected():
+    res = inv_logic.solve_inventory(_params([10, 0]))
+    assert res['status'] == 'Error'
+    assert 'SKU_1' in res['error_msg'] and 'SKU_0' not in res['error_msg']
+
+
+def test_eoq_of_a_priced_item():
+    res = inv_logic.solve_inventory(_params([10]))
+    assert res['status'] == 'Optimal'
+    # sqrt(2 * 1000 * 50 / (0.25 * 10)) = 200
+    assert res['policy']['Q'] == [200.0]
@@ -0,0 +1,58 @@
+# tests/test_model_cache.py
+import pulp
+import pytest
+import model_cache
+import solver_engine
+import modules.cutting.analytics as cut_analytics
+import modules.cutting.logic as cut_logic
+
+CUT_INPUTS = {
+    'cut_table': [{'Item': 'Table_Leg', 'Length': 700, 'Demand': 20, 'Price': 15},
+                  {'Item': 'Shelf_Top', 'Length': 2200, 'Demand': 5, 'Price': 50},
+                  {'Item': 'Coaster', 'Length': 100, 'Demand': 30, 'Price': 5}],
+    'cut_stock_table': [{'Name': 'Short_Bar', 'Length': 1500, 'Cost': 10, 'Limit': 30},
+                        {'Name': 'Long_Bar', 'Length': 5000, 'Cost': 28, 'Limit': 10}]
+}
+
+
+def _cutting(sense, kerf):
+    params, param_list = cut_analytics.get_params(dict(CUT_INPUTS, kerf_val=kerf), sense)
+    obj, const, variables = cut_logic.bridge_cutting(params)
+    return {'parameters': param_list, 'variables': variables}, sense, obj, const
+
+
+def _both_paths(store, sense, obj, const):
+    cached = model_cache.solve(store, sense, obj, const, solver_engine.make_solver())
+    assert cached is not None, "model should take the cache path"
+    prob, _, error = solver_engine.build_problem(store, sense, obj, const)
+    assert error is None
+    prob.solve(solver_engine.make_solver())
+    return cached, prob
+
+
+@pytest.mark.parametrize('sense,kerf', [('minimize', 3), ('maximize', 3), ('minimize', 0)])
+def test_cutting_template_parity(sense, kerf):
+    cached, prob = _both_paths(*_cutting(sense, kerf))
+    pulp_res = solver_engine.collect_results(prob, pulp.LpStatus[prob.status])
+
+    assert cached['status'] == pulp_res['status'] == 'Optimal'
+    assert cached['objective'] == pytest.approx(pulp_res['objective'])
+    assert [c['Constraint'] for c in cached['constraints']] == [c['Constraint'] for c in pulp_res['constraints']]
+
+    # Ties may pick another optimum: the cached solution must be one of the PuLP model's
+    values = {r['Variable']: r['Value'] for r in cached['variables']}
+    for v in prob.variables(): v.varValue = values.get(v.name, 0)
+    assert all(c.valid(1e-6) for c in prob.constraints.values())
+    assert pulp.value(prob.objective) == pytest.approx(cached['objective'])
+
+
+def test_lp_duals_and_slacks_match():
+    store = {'parameters': [], 'variables': [{'name': 'x', 'type': 'Continuous'}, {'name': 'y', 'type': 'Continuous'}]}
+    cached, prob = _both_paths(store, 'maximize', "3 * x + 2 * y", "x + y <= 4\nx + 3 * y <= 6\nx <= 3\nx - y >= -10")
+    pulp_res = solver_engine.collect_results(prob, pulp.LpStatus[prob.status])
+
+    assert cached['variables'] == pulp_res['variables']
+    for a, b in zip(cached['constraints'], pulp_res['constraints']):
+        assert a['Constraint'] == b['Constraint']
+        assert a['Shadow Price'] == pytest.approx(b['Shadow Price'])
+        assert a['Slack'] == pytest.approx(b['Slack'])
@@ -0,0 +1,59 @@
+# tests/test_remnants.py
+import sqlite3
+import pytest
+import modules.cutting.analytics as cut_analytics
+import modules.cutting.remnants as remnants
+
+LONG_BAR = {'Name': 'Long_Bar', 'Length': 5000, 'Cost': 28, 'Limit': 10}
+
+
+@pytest.fixture
+def store(tmp_path):
+    return remnants.RemnantStore(str(tmp_path / 'remnants.db'))
+
+
+def _store_data(stocks, items, kerf=3, use_remnants=True):
+    params = {'Items': [n for n, _ in items], 'ItemLens': [l for _, l in items], 'Demands': {}, 'Prices': {},
+              'Stocks': stocks, 'Kerf': kerf, 'UseRemnants': use_remnants}
+    return {'parameters': [{'name': k, 'data': v} for k, v in params.items()]}
+
+
+def test_short_remnants_are_offered_for_short_pieces(store):
+    store.add([('Long_Bar', 4000 + k, 20) for k in range(3 * remnants.MAX_CANDIDATES)])
+    store.add([('Long_Bar', 400, 2), ('Long_Bar', 450, 2)])
+
+    offered = remnants.remnant_stocks([LONG_BAR], [350, 2000], store=store)
+    lengths = [r['Length'] for r in offered]
+    assert len(offered) <= remnants.MAX_CANDIDATES
+    assert 400 in lengths and 450 in lengths
+    assert max(lengths) == 4000 + 3 * remnants.MAX_CANDIDATES - 1
+
+
+def test_connections_are_closed(store, monkeypatch):
+    opened = []
+    connect = store._connect
+    monkeypatch.setattr(store, '_connect', lambda: opened.append(connect()) or opened[-1])
+
+    store.add([('Long_Bar', 1000, 5)])
+    store.find('Long_Bar', 0)
+    store.commit_plan([], [('Long_Bar', 800, 4)])
+    assert store.count() == 2
+    for conn in opened:
+        with pytest.raises(sqlite3.ProgrammingError):
+            conn.execute("SELECT 1")
+
+
+def test_offcut_length_deducts_the_separating_cut():
+    # One 700 mm piece on a 1500 mm bar: 800 mm left, minus one 3 mm cut
+    res = {'variables': [{'Variable': 'A_IT0_ST0_B0', 'Value': 1}]}
+    stocks = [{'Name': 'Short_Bar', 'Length': 1500, 'Cost': 10, 'Limit': 5}]
+    used, offcuts = cut_analytics.inventory_changes(res, _store_data(stocks, [('Table_Leg', 700)]))
+    assert used == []
+    assert offcuts == [('Short_Bar', 797, pytest.approx(10 * 797 / 1500))]
+
+
+def test_remnants_count_as_their_parent_stock_pattern():
+    stocks = [LONG_BAR] + [{'Name': f"Remnant_{k}", 'Length': 1600, 'Cost': 1, 'Limit': 1, 'RemnantId': k, 'Parent': 'Long_Bar'} for k in (1, 2)]
+    res = {'variables': [{'Variable': 'A_IT0_ST1_B0', 'Value': 2}, {'Variable': 'A_IT0_ST2_B0', 'Value': 2}]}
+    _, _, report = cut_analytics.process_results(res, _store_data(stocks, [('Table_Leg', 700)]))
+    assert "**Distinct Patterns:** `1`" in report
@@ -0,0 +1,120 @@
+# tests/test_reoptimize.py
+import copy
+import pytest
+import solver_engine
+import modules.cutting.analytics as cut_analytics
+import modules.cutting.logic as cut_logic
+
+# The cutting template's default job
+INPUTS = {
+    'cut_table': [{'Item': 'Table_Leg', 'Length': 700, 'Demand': 20, 'Price': 15},
+                  {'Item': 'Shelf_Top', 'Length': 2200, 'Demand': 5, 'Price': 50},
+                  {'Item': 'Coaster', 'Length': 100, 'Demand': 30, 'Price': 5}],
+    'cut_stock_table': [{'Name': 'Short_Bar', 'Length': 1500, 'Cost': 10, 'Limit': 30},
+                        {'Name': 'Long_Bar', 'Length': 5000, 'Cost': 28, 'Limit': 10}],
+    'kerf_val': 3
+}
+
+
+def _job(demand_changes=None):
+    inputs = copy.deepcopy(INPUTS)
+    for row in inputs['cut_table']:
+        row['Demand'] = (demand_changes or {}).get(row['Item'], row['Demand'])
+    params, param_list = cut_analytics.get_params(inputs, 'minimize')
+    return params, {'parameters': param_list}
+
+
+def _solve(params, store):
+    obj, const, variables = cut_logic.bridge_cutting(params)
+    res = solver_engine.solve_model(dict(store, variables=variables), 'minimize', obj, const)
+    assert res['status'] == 'Optimal'
+    return res
+
+
+def _table(res, store):
+    return {row['Stock']: row['Plan'] for row in cut_analytics.process_results(res, store)[1]}
+
+
+def _produced(res, store, item):
+    params = {p['name']: p['data'] for p in store['parameters']}
+    i_idx = params['Items'].index(item)
+    return sum(round(v['Value']) for v in res['variables'] if v['Variable'].startswith(f"A_IT{i_idx}_"))
+
+
+def test_rush_order_keeps_cut_bars_and_their_numbers():
+    params, store = _job()
+    first = _solve(params, store)
+    before = _table(first, store)
+
+    _, rush_store = _job({'Table_Leg': 25})
+    res = cut_logic.reoptimize_plan(first, params, rush_store, [1, 2])
+    after = _table(res, rush_store)
+
+    assert res['status'] == 'Optimal'
+    assert after['Stock #1'] == before['Stock #1']
+    assert after['Stock #2'] == before['Stock #2']
+    # Old bars keep their numbers; new bars only ever get new ones
+    old_numbers = cut_logic.bar_numbers(first)
+    for bin_id, n in res['bar_numbers'].items():
+        if bin_id in old_numbers: assert n == old_numbers[bin_id]
+        else: assert n > max(old_numbers.values())
+    assert _produced(res, rush_store, 'Table_Leg') >= 25
+
+
+def test_second_reoptimization_uses_the_saved_numbers():
+    params, store = _job()
+    first = _solve(params, store)
+    rush_params, rush_store = _job({'Table_Leg': 25})
+    second = cut_logic.reoptimize_plan(first, params, rush_store, [1, 2])
+    numbers = second['bar_numbers']
+    newest = max(numbers.values())
+
+    _, store3 = _job({'Table_Leg': 25, 'Coaster': 40})
+    third = cut_logic.reoptimize_plan(second, rush_params, store3, [1, 2, newest])
+    before, after = _table(second, rush_store), _table(third, store3)
+
+    assert third['status'] == 'Optimal'
+    for n in (1, 2, newest):
+        assert after[f"Stock #{n}"] == before[f"Stock #{n}"]
+    assert _produced(third, store3, 'Coaster') >= 40
+
+
+def test_frozen_bar_vars_pin_the_empty_slots_of_a_cut_bar():
+    params, store = _job()
+    first = _solve(params, store)
+    _, _, variables = cut_logic.bridge_cutting(params)
+    bin_id = next(b for b, n in cut_logic.bar_numbers(first).items() if n == 1)
+
+    frozen = cut_logic.frozen_bar_vars(first, [1], variables)
+    assert sorted(frozen) == sorted([f"U_{bin_id}"] + [f"A_IT{i}_{bin_id}" for i in range(len(params['Items']))])
+
+
+def test_frozen_variables_are_not_sent_to_the_solver():
+    params, store = _job()
+    first = _solve(params, store)
+    obj, const, variables = cut_logic.bridge_cutting(params)
+    frozen = cut_logic.frozen_bar_vars(first, [1, 2], variables)
+    values = {v['Variable']: v['Value'] for v in first['variables']}
+
+    prob, _, error = solver_engine.build_problem(dict(store, variables=variables), 'minimize', obj, const,
+                                                 fixed={name: values.get(name, 0) for name in frozen})
+    assert error is None
+    assert not {v.name for v in prob.variables()} & set(frozen)
+
+
+def test_reoptimize_rejects_changed_stocks_and_unknown_bars():
+    params, store = _job()
+    first = _solve(params, store)
+
+    assert cut_logic.reoptimize_plan(first, params, store, [99])['status'] == 'Error'
+    inputs = copy.deepcopy(INPUTS)
+    inputs['cut_stock_table'][0]['Length'] = 1600
+    _, param_list = cut_analytics.get_params(inputs, 'minimize')
+    assert cut_logic.reoptimize_plan(first, params, {'parameters': param_list}, [1])['status'] == 'Error'
+
+
+def test_parse_bars():
+    assert cut_logic.parse_bars("1-3, 5") == [1, 2, 3, 5]
+    assert cut_logic.parse_bars("") == []
+    with pytest.raises(ValueError):
+        cut_logic.parse_bars("2-x")
@@ -0,0 +1,45 @@
+# tests/test_schedule.py
+import pytest
+import modules.schedule.logic as sched_logic
+
+
+def _longest_run(days):
+    best = run = 0
+    prev = None
+    for d in sorted(days):
+        run = run + 1 if prev is not None and d == prev + 1 else 1
+        best = max(best, run)
+        prev = d
+    return best
+
+
+def _params(n_staff, required, max_consec, max_hours, weeks=4):
+    staff = [f"P{i}" for i in range(n_staff)]
+    return {
+        'Staff': staff, 'Availability': {s: [1] * 7 for s in staff}, 'Required': [required] * 7,
+        'Weeks': weeks, 'ShiftHours': 8, 'MaxHours': max_hours, 'MaxConsec': max_consec, 'MinRest': 11
+    }
+
+
+@pytest.mark.parametrize('n_staff, required, max_consec, max_hours', [
+    (13, 13, 10, 200),   # runs spanning three weeks
+    (15, 13, 10, 80),
+    (13, 13, 8, 200),
+    (14, 12, 8, 60),
+])
+def test_rest_limit_holds_across_several_weeks(n_staff, required, max_consec, max_hours):
+    res = sched_logic.solve_schedule(_params(n_staff, required, max_consec, max_hours))
+    assert res['status'] == 'Optimal'
+    for s, days in res['roster'].items():
+        assert _longest_run(days) <= max_consec, s
+
+
+def test_weekly_hours_and_coverage():
+    params = _params(14, 12, 5, 40, weeks=2)
+    res = sched_logic.solve_schedule(params)
+    assert res['status'] == 'Optimal'
+    for days in res['roster'].values():
+        for w in range(2):
+            assert 8 * sum(1 for d in days if w * 7 <= d < w * 7 + 7) <= 40
+    covered = [sum(1 for days in res['roster'].values() if d in days) for d in range(14)]
+    assert all(c + res['shortages'][d] >= 12 for d, c in enumerate(covered))
@@ -0,0 +1,25 @@
+# tests/test_solver_engine.py
+import solver_engine
+
+
+def test_compact_constraints_keeps_binding_rows_without_duals():
+    # A MIP: CBC reports no shadow prices, only slack
+    n = solver_engine.MAX_CONSTRAINT_ROWS + 100
+    rows = [{'Constraint': f"C_{k}", 'Shadow Price': 0.0, 'Slack': float(k % 7)} for k in range(n)]
+    kept = solver_engine.compact_constraints(rows)
+
+    assert len(kept) == solver_engine.MAX_CONSTRAINT_ROWS + 1
+    assert all(r['Slack'] == 0 for r in kept[:n // 7])
+    assert "100 rows" in kept[-1]['Constraint']
+
+
+def test_compact_constraints_ranks_shadow_prices_first():
+    n = solver_engine.MAX_CONSTRAINT_ROWS + 1
+    rows = [{'Constraint': f"C_{k}", 'Shadow Price': 0.0, 'Slack': 0.0} for k in range(n)]
+    rows[-1] = {'Constraint': 'Budget', 'Shadow Price': -2.5, 'Slack': 4.0}
+    assert solver_engine.compact_constraints(rows)[0]['Constraint'] == 'Budget'
+
+
+def test_small_models_keep_every_row():
+    rows = [{'Constraint': 'C_0', 'Shadow Price': 0.0, 'Slack': 3.0}]
+    assert solver_engine.compact_constraints(rows) == rows
@@ -0,0 +1,42 @@
+# tests/test_solver_pool.py
+import threading
+import pytest
+import solver_pool
+
+
+def test_host_slots_bound_solves_across_pools(tmp_path):
+    # Two pools on one slot directory stand in for two web worker processes
+    slots = lambda: solver_pool.HostSlots(size=1, path=str(tmp_path))
+    first = solver_pool.SolverPool(workers=4, host_slots=slots())
+    second = solver_pool.SolverPool(workers=4, max_wait=0.3, host_slots=slots())
+    started, finish = threading.Event(), threading.Event()
+
+    def hold():
+        started.set()
+        finish.wait(5)
+    t = threading.Thread(target=first.run, args=('10.0.0.1', hold))
+    t.start()
+    started.wait(5)
+    try:
+        with pytest.raises(solver_pool.PoolBusy):
+            second.run('10.0.0.2', lambda: None)
+    finally:
+        finish.set()
+        t.join()
+    assert second.run('10.0.0.2', lambda: 'ok') == 'ok'
+    assert second.stats()['running'] == 0
+
+
+def test_per_client_limit(tmp_path):
+    pool = solver_pool.SolverPool(workers=2, max_per_tenant=1, max_wait=1, host_slots=solver_pool.HostSlots(size=2, path=str(tmp_path)))
+    def nested():
+        # Same client while its first solve runs: rejected; another client: served
+        with pytest.raises(solver_pool.PoolBusy):
+            pool.run('10.0.0.1', lambda: None)
+        return pool.run('10.0.0.2', lambda: 'other client')
+    assert pool.run('10.0.0.1', nested) == 'other client'
+    assert pool.stats()['rejected'] == 1
+
+
+def test_warm_up_solves():
+    assert solver_pool.POOL.warm_up()
@@ -0,0 +1,32 @@
+# tests/test_var_blocks.py
+import solver_engine
+import var_blocks
+
+
+def test_block_names_are_row_major():
+    v = var_blocks.block('A_ST0', 'Integer', 'A_IT{0}_ST0_B{1}', [2, 3])
+    assert var_blocks.size(v) == 6
+    assert list(var_blocks.names(v)) == ['A_IT0_ST0_B0', 'A_IT0_ST0_B1', 'A_IT0_ST0_B2',
+                                         'A_IT1_ST0_B0', 'A_IT1_ST0_B1', 'A_IT1_ST0_B2']
+
+
+def test_scalars_expand_blocks_next_to_plain_scalars():
+    variables = [{'name': 'X', 'type': 'Continuous'}, var_blocks.block('U_ST0', 'Binary', 'U_ST0_B{0}', [2])]
+    assert list(var_blocks.scalars(variables)) == [('X', 'Continuous'), ('U_ST0_B0', 'Binary'), ('U_ST0_B1', 'Binary')]
+
+
+def test_block_round_trip_through_both_solve_paths():
+    # Pick the 2 most valuable of 4 slots: same names and values from the model cache and from PuLP
+    store = {'parameters': [], 'variables': [var_blocks.block('Y', 'Binary', 'Y_{0}', [4])]}
+    obj = "3 * Y_0 + 5 * Y_1 + 1 * Y_2 + 4 * Y_3"
+    const = "Y_0 + Y_1 + Y_2 + Y_3 <= 2"
+
+    prob, symbol_table, error = solver_engine.build_problem(store, 'maximize', obj, const)
+    assert error is None
+    assert all(solver_engine.is_binary(symbol_table[name]) for name in var_blocks.names(store['variables'][0]))
+    prob.solve(solver_engine.make_solver())
+    pulp_values = {v.name: v.varValue for v in prob.variables() if v.varValue}
+
+    res = solver_engine.solve_model(store, 'maximize', obj, const)
+    assert res['status'] == 'Optimal'
+    assert {r['Variable']: r['Value'] for r in res['variables']} == pulp_values == {'Y_1': 1, 'Y_3': 1}
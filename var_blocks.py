@@ -0,0 +1,30 @@
+# var_blocks.py
+import itertools
+import math
+
+# A variable block declares many scalar variables at once:
+#   {'name': 'A_ST0', 'type': 'Integer', 'shape': 'block', 'format': 'A_IT{0}_ST0_B{1}', 'dims': [n_items, n_bars]}
+# Names are only generated where they are needed (the PuLP model, a model
+# cache miss, export), never stored one dict per variable.
+
+def block(name, var_type, fmt, dims):
+    return {'name': name, 'type': var_type, 'shape': 'block', 'format': fmt, 'dims': list(dims)}
+
+def size(v):
+    return math.prod(v['dims'])
+
+def names(v):
+    """Variable names of one block, row-major (last index fastest)."""
+    fmt = v['format']
+    return (fmt.format(*idx) for idx in itertools.product(*(range(d) for d in v['dims'])))
+
+def scalars(variables):
+    """(name, type) of every scalar variable in a store's variable list, blocks expanded lazily."""
+    for v in variables:
+        shape = v.get('shape', 'scalar')
+        var_type = v.get('type', 'Continuous')
+        if shape == 'scalar':
+            yield v['name'], var_type
+        elif shape == 'block':
+            for name in names(v):
+                yield name, var_type